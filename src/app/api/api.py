@@ -7,6 +7,7 @@ from .routers import (
     groups,
     students,
     schedule,
+    analytics,
 )
 
 api_router = APIRouter()
@@ -17,4 +18,5 @@ api_router.include_router(users.router, prefix="/users")
 api_router.include_router(groups.router, prefix="/groups")
 api_router.include_router(students.router, prefix="/students")
 api_router.include_router(teachers.router, prefix="/teachers")
-api_router.include_router(schedule.router, prefix="/schedule")
\ No newline at end of file
+api_router.include_router(schedule.router, prefix="/schedule")
+api_router.include_router(analytics.router, prefix="/analytics")
\ No newline at end of file
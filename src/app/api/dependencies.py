@@ -1,17 +1,20 @@
-from typing import Annotated, AsyncGenerator
-from fastapi import Depends, HTTPException, status
+from typing import Annotated, AsyncGenerator, Awaitable, Callable, Optional
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import (
   OAuth2PasswordBearer,
   SecurityScopes
 )
 from redis.asyncio import Redis
-import json
 
 from core.config import settings
 
 from core.security.jwt import OAuthJWTBearer
+from core.cache import SessionCache
+from core.metrics import RATE_LIMIT_REJECTIONS
+from core.ratelimit import RateLimiter
 from core.db import MongoClient, RedisClient
 from core.schemas.token import TokenData
+from loaders import TeacherLoader
 import crud
 
 async def get_mongo_client() -> AsyncGenerator[MongoClient, None]:
@@ -26,6 +29,64 @@ async def get_redis_client() -> AsyncGenerator[RedisClient, None]:
     await RedisClient.connect()
   yield RedisClient._client
 
+async def get_teacher_loader(
+  mongo: Annotated[MongoClient, Depends(get_mongo_client)]
+) -> TeacherLoader:
+  """Dependency to get a request-scoped teacher loader."""
+  return TeacherLoader(mongo.get_database("users"))
+
+async def form_username(request: Request) -> Optional[str]:
+  """Username of a login form."""
+  return (await request.form()).get("username")
+
+async def body_email(request: Request) -> Optional[str]:
+  """Email of a JSON body."""
+  try:
+    body = await request.json()
+  except ValueError:
+    return None
+  return body.get("email") if isinstance(body, dict) else None
+
+async def token_subject(request: Request) -> Optional[str]:
+  """Subject of the bearer token."""
+  token = request.headers.get("authorization", "").removeprefix("Bearer ").strip()
+  payload = OAuthJWTBearer.decode(token) if token else None
+  return payload.get("sub") if payload else None
+
+class RateLimit:
+  """
+  Dependency limiting the attempts per client IP and per username
+  (resolved by `username`) within the sliding window.
+  """
+  def __init__(
+    self,
+    scope: str,
+    *,
+    username: Optional[Callable[[Request], Awaitable[Optional[str]]]] = None
+  ):
+    self.scope = scope
+    self.username = username
+
+  async def __call__(
+    self,
+    request: Request,
+    redis: Annotated[Redis, Depends(get_redis_client)]
+  ) -> None:
+    if not settings.RATE_LIMIT_ENABLED:
+      return
+    limits = {"ip": (request.client.host if request.client else "unknown", settings.RATE_LIMIT_PER_IP)}
+    if self.username and (username := await self.username(request)):
+      limits["username"] = (str(username).lower(), settings.RATE_LIMIT_PER_USERNAME)
+    retry = await RateLimiter.hit(redis, scope=self.scope, limits=limits, window=settings.RATE_LIMIT_WINDOW_SECONDS)
+    if retry:
+      for kind in retry:
+        RATE_LIMIT_REJECTIONS.labels(self.scope, kind).inc()
+      raise HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many attempts, try again later.",
+        headers={"Retry-After": str(max(retry.values()))}
+      )
+
 oauth2_scheme = OAuth2PasswordBearer(
   tokenUrl=f"{settings.API_V1_STR}/auth/login",
   scopes=settings.scopes
@@ -49,25 +110,25 @@ async def get_current_user(
   # Get data from the payload   
   username, jti = payload.get("sub"), payload.get("jti")
   
-  # Check if jti is revoked
-  if await OAuthJWTBearer.is_jti_in_blacklist(redis, jti=jti):
+  # Check if jti is revoked and read the cached user in one round trip
+  revoked, user = await OAuthJWTBearer.get_session(redis, jti=jti, username=username)
+  if revoked:
     raise HTTPException(
       status_code=status.HTTP_401_UNAUTHORIZED,
       detail="Token has been revoked."
     )
   
-  if not (user_cache := await redis.get(f"auth:user:{username}")):
+  if not user:
     # Authenticate user data from the MongoDB database
     users_db = mongo.get_database("users")
     # Validate user credentials
-    if not (user := await crud.get_user_by_username(users_db, username=username, exclude=["_id"])):
+    if not (user := await crud.get_user_by_username(users_db, username=username, exclude=list(SessionCache.excluded))):
       raise HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Couldn't validate user credentials.",
         headers={"WWW-Authenticate": "Bearer"}
       )
-  else:
-    user = json.loads(user_cache)
+    await SessionCache.set(redis, user)
 
   token_data = TokenData(edbo_id=user.get("edbo_id"), scopes=user.get("scopes"))
   
@@ -0,0 +1,109 @@
+from pymongo.asynchronous.cursor import AsyncCursor
+from typing import AsyncIterable, AsyncIterator, Iterable, Optional, Sequence, Type
+from fastapi.responses import StreamingResponse
+from fastapi import Request, Response
+from pydantic import BaseModel, TypeAdapter
+import collections.abc
+
+import crud
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Flush the stream once the buffered lines exceed this size (bytes)
+CHUNK_SIZE = 64 * 1024
+
+JSON_MEDIA_TYPE = "application/json"
+
+def accepts_ndjson(request: Request) -> bool:
+  """Check if the client asked for a NDJSON stream."""
+  return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+async def _aiter(documents: Iterable[dict]) -> AsyncIterator[dict]:
+  for document in documents:
+    yield document
+
+async def iter_ndjson(
+  documents: AsyncIterable[dict] | Iterable[dict],
+  *,
+  model: Type[BaseModel],
+  exclude_none: bool = False
+) -> AsyncIterator[bytes]:
+  """
+  Serialize documents one by one into NDJSON chunks.
+  """
+  if not isinstance(documents, collections.abc.AsyncIterable):
+    documents = _aiter(documents)
+  chunk, size = [], 0
+  async for document in documents:
+    line = model.model_validate(document).model_dump_json(exclude_none=exclude_none).encode() + b"\n"
+    chunk.append(line)
+    size += len(line)
+    if size >= CHUNK_SIZE:
+      yield b"".join(chunk)
+      chunk, size = [], 0
+  if chunk:
+    yield b"".join(chunk)
+
+class NDJSONResponse(StreamingResponse):
+  """
+  Streams documents from an async cursor as newline-delimited JSON,
+  keeping memory flat regardless of the collection size.
+  """
+  media_type = NDJSON_MEDIA_TYPE
+
+  def __init__(
+    self,
+    documents: AsyncIterable[dict] | Iterable[dict],
+    *,
+    model: Type[BaseModel],
+    exclude_none: bool = False,
+    **kwargs
+  ):
+    super().__init__(
+      iter_ndjson(documents, model=model, exclude_none=exclude_none),
+      media_type=self.media_type,
+      **kwargs
+    )
+
+def model_response(
+  adapter: TypeAdapter,
+  content,
+  *,
+  exclude_none: bool = False,
+  headers: Optional[dict] = None
+) -> Response:
+  """
+  Serialize `content` built with `model_construct` from trusted documents
+  straight to JSON, skipping the response model round trip of FastAPI.
+  """
+  return Response(
+    adapter.dump_json(content, exclude_none=exclude_none),
+    media_type=JSON_MEDIA_TYPE,
+    headers=headers
+  )
+
+async def listing(
+  request: Request,
+  response: Response,
+  cursor: AsyncCursor,
+  *,
+  model: Type[BaseModel],
+  keys: Sequence[str],
+  limit: Optional[int] = None,
+  exclude_none: bool = False
+):
+  """
+  Return the documents of a listing `cursor`, streamed as NDJSON if requested.
+  Pages limited by `limit` carry the next page cursor in the `X-Next-Cursor` header.
+  """
+  headers = {}
+  documents = cursor
+  if limit:
+    documents = await cursor.to_list()
+    if len(documents) == limit:
+      headers[NEXT_CURSOR_HEADER] = crud.encode_cursor(documents[-1], keys=keys)
+  if accepts_ndjson(request):
+    return NDJSONResponse(documents, model=model, exclude_none=exclude_none, headers=headers)
+  response.headers.update(headers)
+  return documents if limit else await cursor.to_list()
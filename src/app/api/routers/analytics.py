@@ -0,0 +1,106 @@
+from typing import Annotated, Optional, List
+from fastapi import (
+  HTTPException,
+  APIRouter,
+  status,
+  Security,
+  Depends,
+  Query,
+  Path
+)
+
+from redis.asyncio import Redis
+from core.db import MongoClient
+
+from core.cache import RedisCache
+from core.schemas.student import StudentBase
+from core.schemas.grade import (
+  StudentGPA,
+  SubjectStats,
+  RankingEntry
+)
+from api.dependencies import (
+  get_mongo_client,
+  get_redis_client,
+  get_current_user
+)
+import crud
+
+router = APIRouter(tags=["Analytics"])
+
+async def read_student_gpa(mongo: MongoClient, redis: Redis, *, edbo_id: int, group: str) -> dict:
+  grades_db = mongo.get_database("grades")
+  return await RedisCache.get_or_set(
+    redis, namespace=f"grades:{group}", key=f"gpa:{edbo_id}",
+    factory=lambda: crud.get_student_gpa(grades_db, edbo_id=edbo_id, group=group))
+
+@router.get("/students/my",
+  status_code=status.HTTP_200_OK,
+  response_model=StudentGPA)
+async def get_current_student_gpa(
+  user: Annotated[dict, Security(get_current_user, scopes=["student"])],
+  mongo: Annotated[MongoClient, Depends(get_mongo_client)],
+  redis: Annotated[Redis, Depends(get_redis_client)]
+):
+  """
+  Returns the current student's per-subject averages and GPA.
+  """
+  student = StudentBase.model_validate(user)
+  return await read_student_gpa(mongo, redis, edbo_id=student.edbo_id, group=student.group)
+
+@router.get("/students/{edbo_id}",
+  status_code=status.HTTP_200_OK,
+  response_model=StudentGPA,
+  dependencies=[Security(get_current_user, scopes=["teacher", "admin"])])
+async def get_student_gpa(
+  edbo_id: Annotated[int, Path()],
+  mongo: Annotated[MongoClient, Depends(get_mongo_client)],
+  redis: Annotated[Redis, Depends(get_redis_client)]
+):
+  """
+  Returns the student's per-subject averages and GPA.
+  """
+  user_db = mongo.get_database("users")
+  student = await user_db.get_collection("students").find_one({"edbo_id": edbo_id}, {"group": 1})
+  if not student:
+    raise HTTPException(
+      status_code=status.HTTP_404_NOT_FOUND,
+      detail="Student not found."
+    )
+  return await read_student_gpa(mongo, redis, edbo_id=edbo_id, group=student["group"])
+
+@router.get("/groups/{group}/subjects",
+  status_code=status.HTTP_200_OK,
+  response_model=List[SubjectStats],
+  dependencies=[Security(get_current_user, scopes=["teacher", "admin"])])
+async def get_group_subject_stats(
+  group: Annotated[str, Path()],
+  mongo: Annotated[MongoClient, Depends(get_mongo_client)],
+  redis: Annotated[Redis, Depends(get_redis_client)]
+):
+  """
+  Returns the group's per-subject grade mean, median and distribution.
+  """
+  grades_db = mongo.get_database("grades")
+  return await RedisCache.get_or_set(
+    redis, namespace=f"grades:{group}", key="subjects",
+    factory=lambda: crud.get_subject_stats(grades_db, group=group))
+
+@router.get("/groups/{group}/ranking",
+  status_code=status.HTTP_200_OK,
+  response_model=List[RankingEntry],
+  dependencies=[Security(get_current_user, scopes=["teacher", "admin"])])
+async def get_group_ranking(
+  group: Annotated[str, Path()],
+  mongo: Annotated[MongoClient, Depends(get_mongo_client)],
+  redis: Annotated[Redis, Depends(get_redis_client)],
+  limit: Annotated[int, Query(ge=1, le=100)] = 10,
+  subject: Annotated[Optional[str], Query()] = None
+):
+  """
+  Returns the group's top `limit` students by average grade, optionally in one `subject`.
+  """
+  grades_db = mongo.get_database("grades")
+  return await RedisCache.get_or_set(
+    redis, namespace=f"grades:{group}", key=f"ranking:{subject or '*'}:{limit}",
+    factory=lambda: crud.get_grades_ranking(grades_db, group=group, limit=limit, subject=subject))
@@ -1,5 +1,4 @@
 from typing import Annotated
-from datetime import timedelta
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi import (
   HTTPException,
@@ -8,18 +7,20 @@ from fastapi import (
   Depends,
   Header,
 )
-import json
 
 from redis.asyncio import Redis
 from core.db import MongoClient
 
-from core.config import settings
+from core.cache import SessionCache
 from core.schemas.token import TokenBase, TokenPayload
 from core.security.jwt import OAuthJWTBearer
 from api.dependencies import (
   get_mongo_client,
   get_redis_client,
-  get_current_user
+  get_current_user,
+  form_username,
+  token_subject,
+  RateLimit
 )
 import crud
 
@@ -27,7 +28,8 @@ router = APIRouter(tags=["Authentication"])
 
 @router.post("/login",
   status_code=status.HTTP_200_OK,
-  response_model=TokenPayload)
+  response_model=TokenPayload,
+  dependencies=[Depends(RateLimit("login", username=form_username))])
 async def login(
   form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
   mongo: Annotated[MongoClient, Depends(get_mongo_client)],
@@ -47,13 +49,14 @@ async def login(
   token = OAuthJWTBearer.encode(payload={"sub": str(edbo_id), "role": role, "scope": scope})
   
   # Store user credentials in Redis database
-  await redis.setex(f"auth:user:{edbo_id}", timedelta(minutes=settings.CACHE_EXPIRE_MINUTES).seconds, json.dumps(user, default=str))
+  await SessionCache.set(redis, user)
 
   return TokenPayload(access_token=token["jwt"], role=role)
 
 @router.post("/token",
   status_code=status.HTTP_200_OK,
-  response_model=TokenPayload)
+  response_model=TokenPayload,
+  dependencies=[Depends(RateLimit("token", username=token_subject))])
 async def auth_token(
   token: Annotated[TokenBase, Header(alias="Authorization")],
   redis: Annotated[Redis, Depends(get_redis_client)]
@@ -72,19 +75,12 @@ async def auth_token(
   # Get variables from the payload   
   role, jti, exp = payload.get("role"), payload.get("jti"), payload.get("exp") 
 
-  # Check if jti is revoked
-  if await OAuthJWTBearer.is_jti_in_blacklist(redis, jti=jti):
+  # Add the access token to the blacklist unless it is already revoked
+  if not await OAuthJWTBearer.revoke_jti(redis, jti=jti, exp=exp):
     raise HTTPException(
       status_code=status.HTTP_401_UNAUTHORIZED,
       detail="Token has been revoked."
     )
-    
-  # Add the access token to the blacklist
-  if not await OAuthJWTBearer.add_jti_to_blacklist(redis, jti=jti, exp=exp):
-    raise HTTPException(
-      status_code=status.HTTP_400_BAD_REQUEST,
-      detail="Failed to add the token to the blacklist."
-    )
   
   # Refresh token
   refresh_token = await OAuthJWTBearer.refresh(payload)
@@ -104,19 +100,12 @@ async def logout(
   # Decode a user's JWT 
   payload = OAuthJWTBearer.decode(token.access_token)
 
-  # Check if jti is revoked
-  if await OAuthJWTBearer.is_jti_in_blacklist(redis, jti=payload.get("jti")):
+  # Add the access token to the blacklist unless it is already revoked
+  if not await OAuthJWTBearer.revoke_jti(redis, jti=payload.get("jti"), exp=payload.get("exp")):
     raise HTTPException(
       status_code=status.HTTP_401_UNAUTHORIZED,
       detail="Token has been revoked."
     )
-
-  # Add the access token to the blacklist
-  if not await OAuthJWTBearer.add_jti_to_blacklist(redis, jti=token.access_token, exp=payload.get("exp")):
-    raise HTTPException(
-      status_code=status.HTTP_409_CONFLICT,
-      detail="An error occured while adding JWT to blacklist."
-    )
   
   raise HTTPException(
     status_code=status.HTTP_200_OK,
@@ -5,12 +5,18 @@ from fastapi import (
     status,
     Security,
     Depends,
+    Request,
     Body
 )
 
+from pydantic import TypeAdapter
+from redis.asyncio import Redis
+from core.config import settings
 from core.db import MongoClient
+from core.db.indexes import ensure_collection
+
+from core.cache import RedisCache
 
-from core.schemas.user import UserBase
 from core.schemas.student import StudentBase
 from core.schemas.group import (
     GroupBase,
@@ -18,20 +24,28 @@ from core.schemas.group import (
 )
 from api.dependencies import (
     get_mongo_client,
+    get_redis_client,
+    get_teacher_loader,
     get_current_user
 )
+from api.responses import NDJSONResponse, accepts_ndjson, model_response
+from loaders import TeacherLoader
+import crud
 
 router = APIRouter(tags=["Groups"])
 
+GROUP = TypeAdapter(GroupBase)
+GROUPS = TypeAdapter(Dict[str, List[GroupBase]])
+
 async def get_disciplines(
-        mongo: MongoClient,
+        teachers: TeacherLoader,
         *,
         group: dict
     ) -> dict:
-    user_db = mongo.get_database("users")
-    collection = user_db.get_collection("teachers")
+    disciplines: dict = group["disciplines"]
+    profiles = await teachers.load_many(disciplines.values())
     group.update(
-        {"disciplines": [{discipline: UserBase(**await collection.find_one({"edbo_id": edbo_id}))} for discipline, edbo_id in group["disciplines"].items()]}
+        {"disciplines": [{discipline: profiles[edbo_id]} for discipline, edbo_id in disciplines.items()]}
     )
     return group
 
@@ -40,27 +54,22 @@ async def get_disciplines(
     dependencies=[Security(get_current_user, scopes=["admin"])])
 async def create_group(
         body: Annotated[GroupCreate, Body],
-        mongo: Annotated[MongoClient, Depends(get_mongo_client)]
+        mongo: Annotated[MongoClient, Depends(get_mongo_client)],
+        redis: Annotated[Redis, Depends(get_redis_client)]
     ):
     """
     Create the student group.
     """
     group_db = mongo.get_database("groups")
-    collections = await group_db.list_collection_names()
-    if body.degree not in collections:
+    if body.degree not in await group_db.list_collection_names() or body.degree == crud.GROUPS_INDEX:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Group degree not found."
         )
-    for _name in collections: 
-        collection = group_db.get_collection(_name)
-        if await collection.find_one({"group": body.group}):
-            raise HTTPException(
-                status_code=status.HTTP_409_CONFLICT,
-                detail="Group already exits."
-            )
-    collection = group_db.get_collection(body.degree)
-    await collection.insert_one(body.model_dump())
+    await crud.create_group(group_db, redis=redis, group=body)
+    # Index the group collections before the first lessons and grades arrive
+    await ensure_collection(mongo.get_database("schedule"), body.group)
+    await ensure_collection(mongo.get_database("grades"), body.group)
     raise HTTPException(
         status_code=status.HTTP_201_CREATED,
         detail="Group created successfully."
@@ -69,7 +78,8 @@ async def create_group(
 @router.get("/read/my", response_model=GroupBase)
 async def get_current_user_group(
         user: Annotated[dict, Security(get_current_user, scopes=["student", "teacher"])],
-        mongo: Annotated[MongoClient, Depends(get_mongo_client)]
+        mongo: Annotated[MongoClient, Depends(get_mongo_client)],
+        teachers: Annotated[TeacherLoader, Depends(get_teacher_loader)]
     ):
     """
     Return the student group.  
@@ -87,76 +97,86 @@ async def get_current_user_group(
                     detail="The student's group not found"
                 )
         case "teachers":
-            for name in await group_db.list_collection_names():
-                collection = group_db.get_collection(name)
-                group: dict = await collection.find_one({"class_teacher_edbo": user.get("edbo_id")})
-                if group: break 
+            group: dict = await crud.get_group(group_db, class_teacher_edbo=user.get("edbo_id"))
             if not group:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail="Group not found"
                 )
-    group = await get_disciplines(mongo, group=group)
-    return group
+    group = await get_disciplines(teachers, group=group)
+    return model_response(GROUP, GroupBase.model_construct(**group))
 
 @router.post("/read", response_model=GroupBase,
     dependencies=[Security(get_current_user, scopes=["teacher", "admin"])])
 async def get_group(
         name: Annotated[str, Body],
-        mongo: Annotated[MongoClient, Depends(get_mongo_client)]
+        mongo: Annotated[MongoClient, Depends(get_mongo_client)],
+        redis: Annotated[Redis, Depends(get_redis_client)],
+        teachers: Annotated[TeacherLoader, Depends(get_teacher_loader)]
     ):
     """
     Read an group by `name`.
     """
     group_db = mongo.get_database("groups")
-    for _name in await group_db.list_collection_names():
-        collection = group_db.get_collection(_name)
-        group = await collection.find_one({"group": name})
-        if group: break
+    async def read_group():
+        group = await crud.get_group(group_db, name=name)
+        return await get_disciplines(teachers, group=group) if group else None
+    group = await RedisCache.get_or_set(redis, namespace="groups", key=f"group:{name}", factory=read_group)
     if not group:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Group not found."
         )
-    group = await get_disciplines(mongo, group=group)
-    return group
+    return model_response(GROUP, GroupBase.model_construct(**group))
 
 @router.get("/read/all", response_model=Dict[str, List[GroupBase]],
     dependencies=[Security(get_current_user, scopes=["teacher", "admin"])])
 async def read_groups(
-        mongo: Annotated[MongoClient, Depends(get_mongo_client)]
+        request: Request,
+        mongo: Annotated[MongoClient, Depends(get_mongo_client)],
+        redis: Annotated[Redis, Depends(get_redis_client)]
     ):
     """
     Return all student groups. 
+    Streams NDJSON if requested with `Accept: application/x-ndjson`.
     """
-    groups = {}
     group_db = mongo.get_database("groups")
-    for _name in await group_db.list_collection_names():
-        collection = group_db.get_collection(_name)
-        group_list = await collection.find().to_list()
-        groups.update({_name: group_list})
-    return groups
+    if accepts_ndjson(request):
+        degrees = [name for name in await group_db.list_collection_names() if name != crud.GROUPS_INDEX]
+        async def iter_groups():
+            for degree in degrees:
+                async for group in group_db.get_collection(degree).find(batch_size=settings.MONGO_BATCH_SIZE):
+                    yield group
+        return NDJSONResponse(iter_groups(), model=GroupBase)
+    async def read_all():
+        groups = {}
+        for _name in await group_db.list_collection_names():
+            if _name == crud.GROUPS_INDEX:
+                continue
+            collection = group_db.get_collection(_name)
+            group_list = await collection.find({}, {"_id": 0}).to_list()
+            groups.update({_name: group_list})
+        return groups
+    groups = await RedisCache.get_or_set(redis, namespace="groups", key="all", factory=read_all)
+    return model_response(GROUPS,
+        {degree: [GroupBase.model_construct(**group) for group in group_list] for degree, group_list in groups.items()})
  
 @router.delete("/delete",
     dependencies=[Security(get_current_user, scopes=["admin"])])
 async def delete_group(
         name: Annotated[str, Body],
-        mongo: Annotated[MongoClient, Depends(get_mongo_client)]
+        mongo: Annotated[MongoClient, Depends(get_mongo_client)],
+        redis: Annotated[Redis, Depends(get_redis_client)]
     ):
     """
     Delete the student group.
     """
     group_db = mongo.get_database("groups") 
-    for _name in await group_db.list_collection_names():
-        collection = group_db.get_collection(_name)
-        group = await collection.find_one({"group": name})
-        if group: break
-    if not group:
+    if not await crud.delete_group(group_db, redis=redis, name=name):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Given group not found."
         )
-    await collection.delete_one(group)
     raise HTTPException(
         status_code=status.HTTP_200_OK,
         detail="The group has been deleted."
@@ -1,4 +1,4 @@
-from typing import Annotated, List
+from typing import Annotated, Optional, List
 from fastapi.responses import JSONResponse 
 from fastapi import (
   HTTPException,
@@ -6,24 +6,45 @@ from fastapi import (
   status,
   Security,
   Depends,
+  Request,
+  Response,
+  Query,
   Path,
   Body
 )
+from pymongo import ReturnDocument
+from datetime import date
 from uuid import uuid4
+import asyncio
 
+from redis.asyncio import Redis
 from core.db import MongoClient
+from core.db.indexes import SCHEDULE_SORT, ensure_collection
+
+from core.config import settings
+from core.cache import RedisCache
 
 from core.schemas.student import StudentBase
 from core.schemas.teacher import TeacherBase
 from core.schemas.schedule import (
   ScheduleBase,
   ScheduleCreate,
-  SchedulePrivate
+  SchedulePrivate,
+  lesson_day
 )
 from api.dependencies import (
   get_mongo_client,
+  get_redis_client,
+  get_teacher_loader,
   get_current_user
 )
+from api.responses import (
+  NEXT_CURSOR_HEADER,
+  NDJSONResponse,
+  accepts_ndjson,
+  listing
+)
+from loaders import TeacherLoader
 import crud
 
 router = APIRouter(tags=["Schedule"])
@@ -35,6 +56,7 @@ async def create_schedule(
   schedule: Annotated[ScheduleCreate, Body()],
   user: Annotated[dict, Security(get_current_user, scopes=["teacher"])],
   mongo: Annotated[MongoClient, Depends(get_mongo_client)],
+  redis: Annotated[Redis, Depends(get_redis_client)],
 ):
   """
   Creates a schedule.
@@ -48,11 +70,7 @@ async def create_schedule(
     )
 
   groups_db = mongo.get_database("groups")
-  for degree in await groups_db.list_collection_names():
-    collection = groups_db.get_collection(degree)
-    group = await collection.find_one({"group": schedule.group})
-    if group: break
-  if not group:
+  if not await crud.get_group(groups_db, name=schedule.group):
     raise HTTPException(
       status_code=status.HTTP_404_NOT_FOUND,
       detail="Given group not found."
@@ -67,9 +85,11 @@ async def create_schedule(
     lesson_id=str(uuid4())
   )
 
-  await collection.insert_one(
-    schedule_private.model_dump(exclude_none=True)
-  )
+  lesson = schedule_private.model_dump(exclude_none=True)
+  await ensure_collection(schedule_db, schedule.group)
+  await collection.insert_one(lesson)
+  await crud.sync_timetable(schedule_db, lesson_id=schedule_private.lesson_id, lesson=lesson)
+  await crud.invalidate_cache(redis, f"schedule:{schedule.group}")
 
   return schedule
 
@@ -78,37 +98,83 @@ async def create_schedule(
   response_model=list[SchedulePrivate],
   response_model_exclude_none=True)
 async def get_current_user_schedule(
+  request: Request,
+  response: Response,
   user: Annotated[dict, Security(get_current_user, scopes=["student", "teacher"])],
-  mongo: Annotated[MongoClient, Depends(get_mongo_client)]
+  mongo: Annotated[MongoClient, Depends(get_mongo_client)],
+  teachers: Annotated[TeacherLoader, Depends(get_teacher_loader)],
+  date_from: Annotated[Optional[date], Query(alias="from")] = None,
+  date_to: Annotated[Optional[date], Query(alias="to")] = None,
+  week: Annotated[Optional[date], Query()] = None,
+  limit: Annotated[Optional[int], Query(ge=1, le=1000)] = None,
+  after: Annotated[Optional[str], Query()] = None
 ):
   """
-  Returns the schedule for the current user. 
+  Returns the schedule for the current user within the `from`/`to` dates
+  or the `week` of the given day, paged by `limit` and the `after` cursor. 
+  Streams NDJSON if requested with `Accept: application/x-ndjson`.
   """
   schedule_db = mongo.get_database("schedule")
+  dates = crud.date_range(date_from, date_to, week)
   match user.get("role"):
     case "students":
       student = StudentBase.model_validate(user) 
       collection = schedule_db.get_collection(student.group)
-      schedule = await collection.find().to_list()
-
+      cursor = crud.find_page(
+        collection, dates, keys=SCHEDULE_SORT, limit=limit, after=after, projection={"_id": 0})
       grades_db = mongo.get_database("grades")
-      grades_doc = await crud.get_grades(grades_db, edbo_id=student.edbo_id, group=student.group)
-      
-      user_db = mongo.get_database("users")
-      collection = user_db.get_collection("teachers")
-      for lesson in schedule:
-        teacher = await collection.find_one({"edbo_id": lesson.pop("teacher_edbo")})
-        lesson.update(
-          {"teacher": TeacherBase.model_validate(teacher).model_dump(),
-           "grade": grades_doc.get(lesson["subject"], {}).get(lesson["date"])})
-      return schedule
+
+      def read_grades() -> asyncio.Future:
+        # The grades live in another database, so they are read alongside the lessons.
+        # Cancelled by the reader once done, in case the lessons fail first.
+        return asyncio.ensure_future(crud.get_grades(grades_db, edbo_id=student.edbo_id, group=student.group))
+
+      async def join(schedule: List[dict], grades_doc: dict) -> List[dict]:
+        # Served by the per-worker teacher profiles cache
+        profiles = await teachers.load_many(lesson.get("teacher_edbo") for lesson in schedule)
+        return [
+          {**lesson,
+           "teacher_edbo": None,
+           "teacher": profiles[lesson.get("teacher_edbo")],
+           "grade": grades_doc.get(lesson["subject"], {}).get(lesson_day(lesson["date"]))}
+          for lesson in schedule]
+
+      if not limit and accepts_ndjson(request):
+        async def iter_lessons():
+          # Started with the body, which is never iterated if the client is gone
+          grades = read_grades()
+          try:
+            batch = []
+            async for lesson in cursor:
+              batch.append(lesson)
+              if len(batch) >= settings.MONGO_BATCH_SIZE:
+                for joined in await join(batch, await grades):
+                  yield joined
+                batch = []
+            for joined in await join(batch, await grades):
+              yield joined
+          finally:
+            grades.cancel()
+        return NDJSONResponse(iter_lessons(), model=SchedulePrivate, exclude_none=True)
+
+      grades = read_grades()
+      try:
+        schedule = await cursor.to_list()
+        grades_doc = await grades
+      finally:
+        grades.cancel()
+      if limit and len(schedule) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = crud.encode_cursor(schedule[-1], keys=SCHEDULE_SORT)
+      return await join(schedule, grades_doc)
 
     case "teachers":
+      # Lessons across all groups, served by the teachers timetable
       teacher = TeacherBase.model_validate(user)
-      for group in await schedule_db.list_collection_names():
-        collection = schedule_db.get_collection(group)
-        schedule = await collection.find({"teacher_edbo": teacher.edbo_id}).to_list()
-        if schedule: break
+      collection = schedule_db.get_collection(crud.TIMETABLE)
+      schedule = await crud.find_page(
+        collection, {"teacher_edbo": teacher.edbo_id, **dates}, keys=SCHEDULE_SORT, limit=limit, after=after).to_list()
+      if limit and len(schedule) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = crud.encode_cursor(schedule[-1], keys=SCHEDULE_SORT)
       return schedule
 
 @router.get("/{group}",
@@ -117,16 +183,35 @@ async def get_current_user_schedule(
   response_model_exclude_none=True,
   dependencies=[Security(get_current_user, scopes=["teacher", "admin"])])
 async def get_schedule_by_group(
+  request: Request,
+  response: Response,
   group: Annotated[str, Path()],
-  mongo: Annotated[MongoClient, Depends(get_mongo_client)]
+  mongo: Annotated[MongoClient, Depends(get_mongo_client)],
+  redis: Annotated[Redis, Depends(get_redis_client)],
+  date_from: Annotated[Optional[date], Query(alias="from")] = None,
+  date_to: Annotated[Optional[date], Query(alias="to")] = None,
+  week: Annotated[Optional[date], Query()] = None,
+  limit: Annotated[Optional[int], Query(ge=1, le=1000)] = None,
+  after: Annotated[Optional[str], Query()] = None
 ):
   """
-  Returns the schedule with the given `group`. 
+  Returns the schedule with the given `group` within the `from`/`to` dates
+  or the `week` of the given day, paged by `limit` and the `after` cursor. 
+  Streams NDJSON if requested with `Accept: application/x-ndjson`.
   """
   schedule_db = mongo.get_database("schedule")
   collection = schedule_db.get_collection(group)
-  schedule = await collection.find().to_list()
-  return schedule
+  dates = crud.date_range(date_from, date_to, week)
+  # Unpaged schedules are served from the cache, by date range
+  if not limit and not after and not accepts_ndjson(request):
+    bounds = dates.get("date", {})
+    key = f"{bounds.get('$gte', '')}:{bounds.get('$lt', '')}" if bounds else "all"
+    return await RedisCache.get_or_set(
+      redis, namespace=f"schedule:{group}", key=key,
+      factory=lambda: crud.find_page(collection, dates, keys=SCHEDULE_SORT, projection={"_id": 0}).to_list())
+  cursor = crud.find_page(collection, dates, keys=SCHEDULE_SORT, limit=limit, after=after)
+  return await listing(request, response, cursor, model=SchedulePrivate, keys=SCHEDULE_SORT,
+    limit=limit, exclude_none=True)
 
 @router.get("/{group}/{id}", 
   status_code=status.HTTP_200_OK,
@@ -165,7 +250,8 @@ async def update_schedule(
   id: Annotated[str, Path()],
   schedule_update: Annotated[ScheduleBase, Body()],
   user: Annotated[MongoClient, Security(get_current_user, scopes=["teacher"])],
-  mongo: Annotated[MongoClient, Depends(get_mongo_client)]
+  mongo: Annotated[MongoClient, Depends(get_mongo_client)],
+  redis: Annotated[Redis, Depends(get_redis_client)]
 ):
   """
   Updates the lesson specified by `id`.
@@ -187,12 +273,15 @@ async def update_schedule(
 
   collection = schedule_db.get_collection(group)
   lesson = await collection.find_one_and_update(
-    {"lesson_id": id}, {"$set": schedule_update.model_dump()})
+    {"lesson_id": id}, {"$set": schedule_update.model_dump()},
+    return_document=ReturnDocument.AFTER)
   if not lesson:
     raise HTTPException(
       status_code=status.HTTP_404_NOT_FOUND,
       detail="Lesson not found."
     )
+  await crud.sync_timetable(schedule_db, lesson_id=id, lesson=lesson)
+  await crud.invalidate_cache(redis, f"schedule:{group}")
   
   return schedule_update
 
@@ -202,7 +291,8 @@ async def update_schedule(
 async def delete_schedule(
   group: Annotated[str, Path()],
   id: Annotated[str, Path()],
-  mongo: Annotated[MongoClient, Depends(get_mongo_client)]
+  mongo: Annotated[MongoClient, Depends(get_mongo_client)],
+  redis: Annotated[Redis, Depends(get_redis_client)]
 ):
   """
   Deletes the lesson specified by `id`.
@@ -223,6 +313,8 @@ async def delete_schedule(
       status_code=status.HTTP_404_NOT_FOUND,
       detail="Lesson not found."
     )
+  await crud.sync_timetable(schedule_db, lesson_id=id, lesson=None)
+  await crud.invalidate_cache(redis, f"schedule:{group}")
   
   return JSONResponse(
     status_code=status.HTTP_200_OK,
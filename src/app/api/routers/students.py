@@ -5,23 +5,31 @@ from fastapi import (
   status,
   Security,
   Depends,
+  Request,
+  Response,
   Query,
   Path,
   Body
 )
 
+from redis.asyncio import Redis
 from core.db import MongoClient
 
+from core.cache import RedisCache
+
 from core.schemas.student import (
   StudentBase,
   StudentCreate
 )
 from core.schemas.grade import GradeBase
-from core.schemas.teacher import TeacherBase
 from api.dependencies import (
   get_mongo_client,
+  get_redis_client,
+  get_teacher_loader,
   get_current_user
 )
+from api.responses import accepts_ndjson, listing
+from loaders import TeacherLoader
 import crud
 
 router = APIRouter(tags=["Students"])
@@ -30,7 +38,8 @@ router = APIRouter(tags=["Students"])
     dependencies=[Security(get_current_user, scopes=["admin"])])
 async def create_student(
         student_create: Annotated[StudentCreate, Body()],
-        mongo: Annotated[MongoClient, Depends(get_mongo_client)] 
+        mongo: Annotated[MongoClient, Depends(get_mongo_client)],
+        redis: Annotated[Redis, Depends(get_redis_client)]
     ):
     """
     Create a student account.
@@ -44,19 +53,32 @@ async def create_student(
             detail="The student's group not found."
         )
     user_db = mongo.get_database("users")
-    return await crud.create_user(user_db, user=student_create)
+    return await crud.create_user(user_db, redis=redis, user=student_create)
 
 @router.post("/group/{name}/all", response_model=List[StudentBase],
     dependencies=[Security(get_current_user, scopes=["teacher", "admin"])])
 async def read_students(
+        request: Request,
+        response: Response,
         name: Annotated[str, Path()],
-        mongo: Annotated[MongoClient, Depends(get_mongo_client)]
+        mongo: Annotated[MongoClient, Depends(get_mongo_client)],
+        redis: Annotated[Redis, Depends(get_redis_client)],
+        limit: Annotated[Optional[int], Query(ge=1, le=1000)] = None,
+        after: Annotated[Optional[str], Query()] = None
     ) -> List[StudentBase]:
     """
-    Fetch a list of all existing students from the given group.
+    Fetch a list of all existing students from the given group,
+    paged by `limit` and the `after` cursor.
+    Streams NDJSON if requested with `Accept: application/x-ndjson`.
     """
     user_db = mongo.get_database("users")
-    return await crud.read_users(user_db, role="students", filter="group", value=name)
+    # The full group list is served from the cache
+    if not limit and not after and not accepts_ndjson(request):
+        return await RedisCache.get_or_set(
+            redis, namespace="users:students", key=f"group:{name}",
+            factory=lambda: crud.read_users(user_db, role="students", filter="group", value=name))
+    cursor = crud.find_users(user_db, role="students", filter="group", value=name, limit=limit, after=after)
+    return await listing(request, response, cursor, model=StudentBase, keys=crud.USERS_SORT, limit=limit)
 
 @router.post("/grades/my")
 async def get_current_student_grades(
@@ -128,24 +150,30 @@ async def get_student_all_grades(
 @router.get("/disciplines")
 async def get_student_disciplines(
   user: Annotated[dict, Security(get_current_user, scopes=["student"])],
-  mongo: Annotated[MongoClient, Depends(get_mongo_client)]
+  mongo: Annotated[MongoClient, Depends(get_mongo_client)],
+  redis: Annotated[Redis, Depends(get_redis_client)],
+  teachers: Annotated[TeacherLoader, Depends(get_teacher_loader)]
 ):
   """
   Fetch the student's disciplines.
   """
   student = StudentBase.model_validate(user)
   
-  disciplines = {}
-  group_db = mongo.get_database("groups")
-  collection = group_db.get_collection(student.degree)
-  group: dict = await collection.find_one({"group": student.group})
-  if not group:
+  async def read_disciplines():
+    group_db = mongo.get_database("groups")
+    collection = group_db.get_collection(student.degree)
+    group: dict = await collection.find_one({"group": student.group})
+    if not group:
+      return None
+    disciplines: dict = group.get("disciplines")
+    profiles = await teachers.load_many(disciplines.values())
+    return {discipline: profiles[edbo_id] for discipline, edbo_id in disciplines.items()}
+
+  disciplines = await RedisCache.get_or_set(
+    redis, namespace="groups", key=f"disciplines:{student.group}", factory=read_disciplines)
+  if disciplines is None:
     raise HTTPException(
       status_code=status.HTTP_404_NOT_FOUND,
       detail="Group not found."
     )
-  user_db = mongo.get_database("users")
-  collection = user_db.get_collection("teachers")
-  for k, v in group.get("disciplines").items():
-    disciplines.update({k: TeacherBase(**await collection.find_one({"edbo_id": v}))})
   return disciplines
\ No newline at end of file
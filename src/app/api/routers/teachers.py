@@ -1,4 +1,6 @@
-from typing import Annotated
+from typing import Annotated, Dict, List
+from pymongo.errors import BulkWriteError
+from pymongo import UpdateOne
 from fastapi import (
     HTTPException,
     APIRouter,
@@ -9,13 +11,19 @@ from fastapi import (
     Body
 )
 
+from redis.asyncio import Redis
 from core.db import MongoClient
 
 from core.schemas.student import StudentBase
 from core.schemas.teacher import TeacherCreate
-from core.schemas.grade import SetGrade
+from core.schemas.grade import (
+    SetGrade,
+    SetGrades,
+    GradeResult
+)
 from api.dependencies import (
     get_mongo_client,
+    get_redis_client,
     get_current_user
 )
 import crud
@@ -26,20 +34,22 @@ router = APIRouter(tags=["Teachers"])
     dependencies=[Security(get_current_user, scopes=["admin"])])
 async def create_teacher(
         teacher_create: Annotated[TeacherCreate, Body],
-        mongo: Annotated[MongoClient, Depends(get_mongo_client)]
+        mongo: Annotated[MongoClient, Depends(get_mongo_client)],
+        redis: Annotated[Redis, Depends(get_redis_client)]
     ):
     """
     Create a teacher account.
     """
     user_db = mongo.get_database("users")
-    return await crud.create_user(user_db, user=teacher_create)
+    return await crud.create_user(user_db, redis=redis, user=teacher_create)
 
 @router.patch("/assessment/{edbo_id}/grade")
 async def assessment_grade(
         edbo_id: Annotated[int, Path],
         body: Annotated[SetGrade, Body],
         teacher: Annotated[dict, Security(get_current_user, scopes=["teacher"])],
-        mongo: Annotated[MongoClient, Depends(get_mongo_client)]
+        mongo: Annotated[MongoClient, Depends(get_mongo_client)],
+        redis: Annotated[Redis, Depends(get_redis_client)]
     ):
     """
     Assess the student
@@ -51,21 +61,77 @@ async def assessment_grade(
         )
     user_db = mongo.get_database("users")
     collection = user_db.get_collection("students")
-    student = StudentBase(**await collection.find_one({"edbo_id": edbo_id}))
+    student = await collection.find_one({"edbo_id": edbo_id})
     if not student:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Student not found."
         )
+    student = StudentBase(**student)
     grade_db = mongo.get_database("grades")
     collection = grade_db.get_collection(student.group)
+    # Creates the grades document of a student without one
     await collection.update_one(
         filter={"edbo_id": edbo_id},
         update={
             "$set": {f"disciplines.{body.subject}.{body.date}": body.grade}
-        }
+        },
+        upsert=True
     )
+    await crud.invalidate_cache(redis, f"grades:{student.group}")
     raise HTTPException(
         status_code=status.HTTP_200_OK,
         detail="Student grade successfully added."
-    )
\ No newline at end of file
+    )
+
+@router.patch("/assessment/grades", response_model=List[GradeResult])
+async def assessment_grades(
+        body: Annotated[SetGrades, Body],
+        teacher: Annotated[dict, Security(get_current_user, scopes=["teacher"])],
+        mongo: Annotated[MongoClient, Depends(get_mongo_client)],
+        redis: Annotated[Redis, Depends(get_redis_client)]
+    ):
+    """
+    Assess the students in bulk, reporting the result per student.
+    """
+    if body.subject not in teacher["disciplines"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have access to this discipline."
+        )
+    # Validate all students with a single query
+    user_db = mongo.get_database("users")
+    collection = user_db.get_collection("students")
+    groups: Dict[int, str] = {
+        student["edbo_id"]: student["group"] async for student in collection.find(
+            {"edbo_id": {"$in": [item.edbo_id for item in body.grades]}},
+            {"_id": 0, "edbo_id": 1, "group": 1})
+    }
+
+    results: List[GradeResult] = []
+    operations: Dict[str, list] = {}
+    for item in body.grades:
+        if item.edbo_id not in groups:
+            results.append(GradeResult(edbo_id=item.edbo_id, status="not_found", detail="Student not found."))
+            continue
+        results.append(GradeResult(edbo_id=item.edbo_id, status="updated"))
+        # Creates the grades document of students without one
+        operations.setdefault(groups[item.edbo_id], []).append((len(results) - 1, UpdateOne(
+            filter={"edbo_id": item.edbo_id},
+            update={"$set": {f"disciplines.{body.subject}.{body.date}": item.grade}},
+            upsert=True
+        )))
+
+    # One unordered bulk write per group grades collection
+    grade_db = mongo.get_database("grades")
+    for group, requests in operations.items():
+        collection = grade_db.get_collection(group)
+        try:
+            await collection.bulk_write([request for _, request in requests], ordered=False)
+        except BulkWriteError as err:
+            for error in err.details.get("writeErrors", []):
+                result = results[requests[error["index"]][0]]
+                result.status, result.detail = "failed", error.get("errmsg")
+    if operations:
+        await crud.invalidate_cache(redis, *(f"grades:{group}" for group in operations))
+    return results
@@ -7,6 +7,7 @@ from fastapi import (
     Body
 )
 
+from redis.asyncio import Redis
 from core.db import MongoClient
 
 from core.security.utils import Hash
@@ -17,7 +18,10 @@ from core.schemas.etc import (
 )
 from api.dependencies import (
     get_mongo_client,
-    get_current_user
+    get_redis_client,
+    get_current_user,
+    body_email,
+    RateLimit
 )
 import crud
 
@@ -38,7 +42,8 @@ async def get_active_user(
 async def add_user_email(
         user_update: Annotated[UserUpdateEmail, Body()],
         user: Annotated[dict, Depends(get_current_user)],
-        mongo: Annotated[MongoClient, Depends(get_mongo_client)]
+        mongo: Annotated[MongoClient, Depends(get_mongo_client)],
+        redis: Annotated[Redis, Depends(get_redis_client)]
     ):
     """
     Add email to the user account.
@@ -49,25 +54,28 @@ async def add_user_email(
             status_code=status.HTTP_409_CONFLICT,
             detail="That email is already associated with another account.")
     user = await crud.authenticate_user(user_db, username=user["edbo_id"], plain_pwd=user_update.password)
-    await crud.update_user(user_db, edbo_id=user["edbo_id"], update_doc={"email": user_update.email})
+    await crud.update_user(user_db, redis=redis, edbo_id=user["edbo_id"], update_doc={"email": user_update.email})
 
 @router.patch("/update/password")
 async def update_password_me(
         body: Annotated[UpdatePassword, Body()],
         user: Annotated[dict, Depends(get_current_user)],
-        mongo: Annotated[MongoClient, Depends(get_mongo_client)]
+        mongo: Annotated[MongoClient, Depends(get_mongo_client)],
+        redis: Annotated[Redis, Depends(get_redis_client)]
     ):
     """
     Update own passoword.
     """
     user_db = mongo.get_database("users")
     user = await crud.authenticate_user(user_db, username=user["edbo_id"], plain_pwd=body.current_password)
-    await crud.update_user(user_db, edbo_id=user["edbo_id"], update_doc={"password": Hash.hash(plain=body.new_password)})
+    await crud.update_user(user_db, redis=redis, edbo_id=user["edbo_id"], update_doc={"password": await Hash.ahash(plain=body.new_password)})
 
-@router.patch("/password-recovery")
+@router.patch("/password-recovery",
+    dependencies=[Depends(RateLimit("password-recovery", username=body_email))])
 async def password_recovery(
         body: PasswordRecovery = Body(),
-        mongo: MongoClient = Depends(get_mongo_client)
+        mongo: MongoClient = Depends(get_mongo_client),
+        redis: Redis = Depends(get_redis_client)
     ):
     """
     Password recovery.
@@ -79,4 +87,4 @@ async def password_recovery(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Couldn't find your account."
         )
-    await crud.update_user(user_db, edbo_id=user["edbo_id"], update_doc={"password": Hash.hash(plain=body.new_password)})
\ No newline at end of file
+    await crud.update_user(user_db, redis=redis, edbo_id=user["edbo_id"], update_doc={"password": await Hash.ahash(plain=body.new_password)})
\ No newline at end of file
@@ -1,20 +1,33 @@
-from typing import Annotated, Optional, List
+from typing import Annotated, Optional, Literal, List
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from fastapi import (
+    HTTPException,
     APIRouter,
+    UploadFile,
+    status,
     Security,
     Depends,
+    Request,
+    Response,
+    Query,
     Body,
     Path,
 )
 
+from redis.asyncio import Redis
 from core.db import MongoClient
 
 from core.schemas.user import UserBase, UserUpdate
 from api.dependencies import (
     get_mongo_client,
+    get_redis_client,
     get_current_user
 )
+from api.responses import NDJSON_MEDIA_TYPE, listing
+import imports
 import crud
+import json
 
 router = APIRouter(tags=["Users"])
     
@@ -33,51 +46,93 @@ async def read_user(
 @router.get("/read/{role}/all", response_model=List[UserBase],
     dependencies=[Security(get_current_user, scopes=["admin"])])
 async def read_users(
+        request: Request,
+        response: Response,
         role: Annotated[str, Path],
-        filter: Annotated[None, Optional[str]],
-        value: Annotated[None, Optional[str]],
-        mongo: Annotated[MongoClient, Depends(get_mongo_client)]   
+        mongo: Annotated[MongoClient, Depends(get_mongo_client)],
+        filter: Annotated[Optional[str], Query()] = None,
+        value: Annotated[Optional[str], Query()] = None,
+        limit: Annotated[Optional[int], Query(ge=1, le=1000)] = None,
+        after: Annotated[Optional[str], Query()] = None
     ):
     """
-    Return all users.
+    Return all users, paged by `limit` and the `after` cursor.
+    Streams NDJSON if requested with `Accept: application/x-ndjson`.
     """
     user_db = mongo.get_database("users")
-    return await crud.read_users(user_db, role=role, filter=filter, value=value)
+    cursor = crud.find_users(user_db, role=role, filter=filter, value=value, limit=limit, after=after)
+    return await listing(request, response, cursor, model=UserBase, keys=crud.USERS_SORT, limit=limit)
 
 @router.patch("/update/{edbo_id}",
     dependencies=[Security(get_current_user, scopes=["teacher", "admin"])])
 async def update_user(
         edbo_id: Annotated[int, Path],
         update_doc: Annotated[UserUpdate, Body],
-        mongo: Annotated[MongoClient, Depends(get_mongo_client)]
+        mongo: Annotated[MongoClient, Depends(get_mongo_client)],
+        redis: Annotated[Redis, Depends(get_redis_client)]
     ):
     """
     Update user data by `edbo_id`.
     """
     user_db = mongo.get_database("users")
-    await crud.update_user(user_db, edbo_id=edbo_id, update_doc=update_doc)
+    await crud.update_user(user_db, redis=redis, edbo_id=edbo_id, update_doc=update_doc)
 
 @router.patch("/update/all",
     dependencies=[Security(get_current_user, scopes=["admin"])])
 async def update_all_users(
         role: Annotated[str, Path],
         update_doc: Annotated[UserUpdate, Body],
-        mongo: Annotated[MongoClient, Depends(get_mongo_client)]
+        mongo: Annotated[MongoClient, Depends(get_mongo_client)],
+        redis: Annotated[Redis, Depends(get_redis_client)]
     ):
     """
     Update users data.
     """
     user_db = mongo.get_database("users")
-    await crud.update_all_users(user_db, role=role, update_doc=update_doc)
+    await crud.update_all_users(user_db, redis=redis, role=role, update_doc=update_doc)
 
 @router.delete("/delete/{edbo_id}",
     dependencies=[Security(get_current_user, scopes=["admin"])])
 async def delete_user(
         edbo_id: Annotated[int, Path],
-        mongo: Annotated[MongoClient, Depends(get_mongo_client)] 
+        mongo: Annotated[MongoClient, Depends(get_mongo_client)],
+        redis: Annotated[Redis, Depends(get_redis_client)]
     ):
     """
     Delete an exiting user account.
     """
     user_db = mongo.get_database("users")
-    return await crud.delete_user(user_db, edbo_id=edbo_id)
\ No newline at end of file
+    return await crud.delete_user(user_db, redis=redis, edbo_id=edbo_id)
+
+@router.post("/import/{role}",
+    dependencies=[Security(get_current_user, scopes=["admin"])])
+async def import_users(
+        role: Annotated[Literal["students", "teachers"], Path],
+        file: UploadFile,
+        mongo: Annotated[MongoClient, Depends(get_mongo_client)],
+        redis: Annotated[Redis, Depends(get_redis_client)]
+    ):
+    """
+    Import user accounts from a CSV, JSON Lines or JSON file.
+    Streams the progress as NDJSON, the last line holds the per-row errors.
+    """
+    try:
+        format = imports.detect_format(file.filename or "")
+    except ValueError as err:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=str(err)
+        )
+    # The upload is closed once the response starts, parse it into a spooled file up front
+    try:
+        spool = await run_in_threadpool(imports.spool_rows, file.file, format=format)
+    except ValueError as err:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Couldn't read the import file: {err}"
+        )
+    user_db = mongo.get_database("users")
+    async def progress():
+        async for report in imports.import_users(user_db, redis, imports.spooled_rows(spool), role=role):
+            yield json.dumps(report, default=str) + "\n"
+    return StreamingResponse(progress(), media_type=NDJSON_MEDIA_TYPE)
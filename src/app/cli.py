@@ -0,0 +1,166 @@
+from pathlib import Path
+import argparse
+import asyncio
+import json
+import os
+
+from core.security.keys import generate_private_key, private_key_to_pem, new_kid
+from core.logger import logger
+from core.config import settings
+from core.db.indexes import ensure_indexes, report_indexes
+from core.db import MongoClient, RedisClient
+import imports
+import crud
+
+async def rebuild_users_index(args: argparse.Namespace):
+  """
+  Rebuild the users directory from the role collections.
+  """
+  await MongoClient.connect()
+  try:
+    count = await crud.rebuild_users_index(MongoClient.get_database("users"))
+    logger.info(f"[+] Users directory rebuilt: {count} accounts indexed.")
+  finally:
+    await MongoClient.close()
+
+async def rebuild_groups_index(args: argparse.Namespace):
+  """
+  Rebuild the groups directory from the degree collections.
+  """
+  await MongoClient.connect()
+  try:
+    count = await crud.rebuild_groups_index(MongoClient.get_database("groups"))
+    logger.info(f"[+] Groups directory rebuilt: {count} groups indexed.")
+  finally:
+    await MongoClient.close()
+
+async def rebuild_timetable(args: argparse.Namespace):
+  """
+  Rebuild the teachers timetable from the group schedule collections.
+  """
+  await MongoClient.connect()
+  try:
+    count = await crud.rebuild_timetable(MongoClient.get_database("schedule"))
+    logger.info(f"[+] Teachers timetable rebuilt: {count} lessons indexed.")
+  finally:
+    await MongoClient.close()
+
+async def migrate_lesson_dates(args: argparse.Namespace):
+  """
+  Convert the string lesson dates into datetimes and key the grades by lesson day.
+  """
+  await MongoClient.connect()
+  try:
+    report = await crud.migrate_lesson_dates(MongoClient.get_database("schedule"))
+    grades = await crud.migrate_grade_dates(MongoClient.get_database("grades"))
+  finally:
+    await MongoClient.close()
+  logger.info(f"[+] Lesson dates migrated: {report['converted']} converted, {report['failed']} invalid.")
+  logger.info(f"[+] Grade dates migrated: {grades['converted']} students, {grades['failed']} invalid.")
+
+async def create_indexes(args: argparse.Namespace):
+  """
+  Create the registered indexes of every collection.
+  """
+  await MongoClient.connect()
+  try:
+    await ensure_indexes(MongoClient._client)
+  finally:
+    await MongoClient.close()
+
+async def index_report(args: argparse.Namespace):
+  """
+  Report the missing and the unused indexes.
+  """
+  await MongoClient.connect()
+  try:
+    report = await report_indexes(MongoClient._client)
+  finally:
+    await MongoClient.close()
+  for index in report["missing"]:
+    logger.warning(f"[!] Missing index {index}.")
+  for index in report["unused"]:
+    logger.warning(f"[!] Unused index {index}.")
+  logger.info(f"[+] {len(report['missing'])} missing, {len(report['unused'])} unused indexes.")
+
+async def import_users(args: argparse.Namespace):
+  """
+  Import user accounts from a CSV, JSON Lines or JSON file.
+  """
+  format = imports.detect_format(args.file)
+  # The imported accounts invalidate the cached listings
+  if (redis := await RedisClient.connect()) is None:
+    raise SystemExit("[x] Couldn't connect to Redis.")
+  await MongoClient.connect()
+  try:
+    with open(args.file, "rb") as file:
+      # Streamed, the batches before an unreadable part of the file are imported
+      rows = imports.read_rows(file, format=format)
+      async for report in imports.import_users(
+          MongoClient.get_database("users"), redis, rows, role=args.role, batch_size=args.batch_size):
+        logger.info(f"[+] Processed {report['processed']} rows: {report['created']} created, {report['failed']} failed.")
+  except ValueError as err:
+    raise SystemExit(f"[x] Couldn't read the import file: {err}")
+  finally:
+    await MongoClient.close()
+    await RedisClient.close()
+  if report["errors"]:
+    with open(args.report, "w") as file:
+      json.dump(report["errors"], file, indent=2, default=str)
+    logger.warning(f"[!] {len(report['errors'])} rows failed, see {args.report}.")
+
+async def generate_key(args: argparse.Namespace):
+  """
+  Generate a JWT signing key into the keys directory.
+  """
+  directory = Path(args.dir)
+  directory.mkdir(parents=True, exist_ok=True)
+  kid = args.kid or new_kid()
+  path = directory / f"{kid}.pem"
+  if path.exists():
+    raise SystemExit(f"[x] Key '{path}' already exists.")
+  # Create the key file readable by the owner only
+  fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+  with os.fdopen(fd, "wb") as file:
+    file.write(private_key_to_pem(generate_private_key()))
+  logger.info(f"[+] Signing key '{kid}' written to {path}.")
+
+def main():
+  parser = argparse.ArgumentParser(prog="unify", description="Unify maintenance commands.")
+  commands = parser.add_subparsers(dest="command", required=True)
+
+  command = commands.add_parser("rebuild-users-index", help="Rebuild the users directory.")
+  command.set_defaults(handler=rebuild_users_index)
+
+  command = commands.add_parser("rebuild-groups-index", help="Rebuild the groups directory.")
+  command.set_defaults(handler=rebuild_groups_index)
+
+  command = commands.add_parser("rebuild-timetable", help="Rebuild the teachers timetable.")
+  command.set_defaults(handler=rebuild_timetable)
+
+  command = commands.add_parser("migrate-lesson-dates", help="Convert the lesson dates into datetimes and the grade dates into lesson days.")
+  command.set_defaults(handler=migrate_lesson_dates)
+
+  command = commands.add_parser("create-indexes", help="Create the registered indexes.")
+  command.set_defaults(handler=create_indexes)
+
+  command = commands.add_parser("index-report", help="Report the missing and unused indexes.")
+  command.set_defaults(handler=index_report)
+
+  command = commands.add_parser("import-users", help="Import user accounts from a file.")
+  command.add_argument("role", choices=sorted(imports.IMPORT_MODELS))
+  command.add_argument("file", help="CSV, JSON Lines (.jsonl) or JSON file.")
+  command.add_argument("--batch-size", type=int, default=settings.IMPORT_BATCH_SIZE)
+  command.add_argument("--report", default="import-errors.json", help="Per-row error report path.")
+  command.set_defaults(handler=import_users)
+
+  command = commands.add_parser("generate-key", help="Generate a JWT signing key.")
+  command.add_argument("--dir", default="keys", help="Keys directory (JWT_KEYS_DIR).")
+  command.add_argument("--kid", help="Key id, a timestamp by default.")
+  command.set_defaults(handler=generate_key)
+
+  args = parser.parse_args()
+  asyncio.run(args.handler(args))
+
+if __name__ == "__main__":
+  main()
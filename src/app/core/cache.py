@@ -0,0 +1,190 @@
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from fastapi.encoders import jsonable_encoder
+from datetime import timedelta
+from redis.asyncio import Redis
+from bson import ObjectId
+import json
+
+from core.metrics import RESPONSE_CACHE_LOOKUPS
+from core.db.redis import LuaScript
+from core.config import settings
+
+# Read the namespace version and the versioned entry in one round trip
+_GET_SCRIPT = LuaScript("""
+local version = redis.call('GET', KEYS[1]) or '0'
+return {version, redis.call('GET', ARGV[1] .. ':v' .. version .. ':' .. ARGV[2])}
+""")
+
+# Replace the session only if it is still live, so writes never resurrect a logged out user
+_REPLACE_SCRIPT = LuaScript("""
+if redis.call('EXISTS', KEYS[1]) == 0 then
+  return 0
+end
+redis.call('DEL', KEYS[1])
+redis.call('HSET', KEYS[1], unpack(ARGV, 2))
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return 1
+""")
+
+# Track the session in the expiry-scored set of its role, and rescore the members
+# due by the remaining TTL of their (slid) sessions, dropping the expired ones
+_TRACK_SCRIPT = LuaScript("""
+local now = tonumber(redis.call('TIME')[1])
+redis.call('ZADD', KEYS[1], now + tonumber(ARGV[3]), ARGV[2])
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', now, 'LIMIT', 0, tonumber(ARGV[4]))
+for _, member in ipairs(due) do
+  local ttl = redis.call('TTL', ARGV[1] .. ':' .. member)
+  if ttl == -2 then
+    redis.call('ZREM', KEYS[1], member)
+  else
+    redis.call('ZADD', KEYS[1], now + math.max(ttl, 1), member)
+  end
+end
+return #due
+""")
+
+class RedisCache:
+  """
+    Versioned cache of JSON-serialized values in Redis.
+
+    Entry keys embed the version of their namespace (e.g. `grades:<group>`),
+    so bumping the version invalidates the whole namespace at once, while
+    the orphaned entries expire by TTL.
+  """
+  prefix = "cache"
+  # Hits and misses per namespace root (`groups`, `schedule`, ...)
+  stats: Dict[str, Dict[str, int]] = {}
+
+  @classmethod
+  def _version_key(cls, namespace: str) -> str:
+    return f"{cls.prefix}:{namespace}:version"
+
+  @classmethod
+  async def get(cls, redis: Redis, *, namespace: str, key: str) -> Tuple[str, Optional[Any]]:
+    """
+    Returns the namespace version and the cached value, if any.
+    """
+    version, value = await _GET_SCRIPT(redis)(keys=[cls._version_key(namespace)], args=[f"{cls.prefix}:{namespace}", key])
+    root = namespace.split(":", 1)[0]
+    stats = cls.stats.setdefault(root, {"hits": 0, "misses": 0})
+    stats["hits" if value is not None else "misses"] += 1
+    RESPONSE_CACHE_LOOKUPS.labels(root, "hit" if value is not None else "miss").inc()
+    return version, json.loads(value) if value is not None else None
+
+  @classmethod
+  async def set(cls, redis: Redis, *, namespace: str, key: str, version: str, value: Any, ttl: Optional[int] = None) -> None:
+    """
+    Stores the value under the given namespace version.
+    """
+    await redis.setex(
+      f"{cls.prefix}:{namespace}:v{version}:{key}",
+      ttl or settings.CACHE_TTL_SECONDS,
+      json.dumps(jsonable_encoder(value, custom_encoder={ObjectId: str})))
+
+  @classmethod
+  async def get_or_set(cls, redis: Redis, *, namespace: str, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    Returns the cached value, computing and storing it with `factory` on a miss.
+    """
+    version, value = await cls.get(redis, namespace=namespace, key=key)
+    if value is None:
+      value = await factory()
+      await cls.set(redis, namespace=namespace, key=key, version=version, value=value)
+    return value
+
+  @classmethod
+  def metrics(cls) -> Dict[str, Dict[str, float]]:
+    """
+    Returns the hits, misses and hit ratio per namespace root.
+    """
+    return {
+      root: {**stats, "ratio": stats["hits"] / total if (total := stats["hits"] + stats["misses"]) else 0.0}
+      for root, stats in cls.stats.items()
+    }
+
+  @classmethod
+  async def invalidate(cls, redis: Redis, *namespaces: str) -> None:
+    """
+    Bumps the version of the given namespaces.
+    """
+    async with redis.pipeline(transaction=False) as pipe:
+      for namespace in namespaces:
+        pipe.incr(cls._version_key(namespace))
+      await pipe.execute()
+
+class SessionCache:
+  """
+    Cache of the authenticated users, stored as Redis hashes of JSON-encoded
+    fields under `auth:user:<edbo_id>`.
+
+    Reads slide the expiry, and user writes replace or drop the entry,
+    so changed scopes and deleted accounts take effect immediately.
+  """
+  prefix = "auth:user"
+  # Session ids per role scored by expiry, to drop them on role-wide updates
+  roles_prefix = "auth:sessions"
+  # Expired members pruned per stored session
+  prune_batch = 100
+  excluded = ("_id", "password")
+  ttl = int(timedelta(minutes=settings.CACHE_EXPIRE_MINUTES).total_seconds())
+
+  @classmethod
+  def key(cls, edbo_id: int | str) -> str:
+    return f"{cls.prefix}:{edbo_id}"
+
+  @classmethod
+  def encode(cls, user: dict) -> Dict[str, str]:
+    return {
+      field: json.dumps(value)
+      for field, value in jsonable_encoder(user, custom_encoder={ObjectId: str}).items()
+      if field not in cls.excluded
+    }
+
+  @staticmethod
+  def decode(fields: Dict[str, str]) -> dict:
+    return {field: json.loads(value) for field, value in fields.items()}
+
+  @classmethod
+  async def set(cls, redis: Redis, user: dict) -> None:
+    """
+    Stores the user session.
+    """
+    key = cls.key(user["edbo_id"])
+    async with redis.pipeline(transaction=True) as pipe:
+      pipe.delete(key)
+      pipe.hset(key, mapping=cls.encode(user))
+      pipe.expire(key, cls.ttl)
+      await _TRACK_SCRIPT(redis)(
+        keys=[f"{cls.roles_prefix}:{user['role']}"],
+        args=[cls.prefix, user["edbo_id"], cls.ttl, cls.prune_batch],
+        client=pipe)
+      await pipe.execute()
+
+  @classmethod
+  async def replace(cls, redis: Redis, user: dict) -> bool:
+    """
+    Replaces the user session with the updated `user`, if it is live.
+    """
+    fields = [item for pair in cls.encode(user).items() for item in pair]
+    return bool(await _REPLACE_SCRIPT(redis)(keys=[cls.key(user["edbo_id"])], args=[cls.ttl, *fields]))
+
+  @classmethod
+  async def invalidate(cls, redis: Redis, *edbo_ids: int | str) -> None:
+    """
+    Drops the sessions of the given users.
+    """
+    if edbo_ids:
+      await redis.delete(*(cls.key(edbo_id) for edbo_id in edbo_ids))
+
+  @classmethod
+  async def invalidate_role(cls, redis: Redis, role: str) -> None:
+    """
+    Drops the sessions of all users of `role`.
+    """
+    members_key = f"{cls.roles_prefix}:{role}"
+    async with redis.pipeline(transaction=True) as pipe:
+      pipe.zrange(members_key, 0, -1)
+      pipe.delete(members_key)
+      edbo_ids, _ = await pipe.execute()
+    for start in range(0, len(edbo_ids), 1000):
+      await cls.invalidate(redis, *edbo_ids[start:start + 1000])
@@ -1,15 +1,7 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from cryptography.hazmat.primitives import serialization
-from cryptography.hazmat.primitives.asymmetric import rsa
-from cryptography.hazmat.backends import default_backend
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Literal
 import secrets
-
-private_key = rsa.generate_private_key(
-  public_exponent=65537,
-  key_size=2048,
-  backend=default_backend()
-)
+import os
 
 class Settings(BaseSettings): 
   model_config = SettingsConfigDict(
@@ -25,6 +17,16 @@ class Settings(BaseSettings):
   VERSION: str = "0.0.1"
   API_V1_STR: str = "/api/v1"
 
+  # Server settings
+  SERVER_HOST: str = "0.0.0.0"
+  SERVER_PORT: int = 10000
+  # Proxies trusted for the client IP of X-Forwarded-For, comma separated, or "*"
+  FORWARDED_ALLOW_IPS: str = "127.0.0.1"
+  # Worker processes, one per CPU if 0 
+  WORKERS: int = 0
+  # Smallest per-worker pool, the worker count is capped so that every worker gets one
+  WORKER_MIN_POOL_SIZE: int = 8
+
   # MongoDB settings    
   MONGO_HOSTNAME: str
   MONGO_USERNAME: str
@@ -35,6 +37,9 @@ class Settings(BaseSettings):
   MONGO_CONNECT_TIMEOUT_MS: int = 10000
   MONGO_SERVER_SELECTION_TIMEOUT_MS: int = 10000
   MONGO_RETRY_WRITES: bool = True
+  MONGO_BATCH_SIZE: int = 500
+  MONGO_ENSURE_INDEXES: bool = True
+  IMPORT_BATCH_SIZE: int = 500
     
   # Redis settings
   REDIS_HOST: str
@@ -42,12 +47,44 @@ class Settings(BaseSettings):
   REDIS_USERNAME: str
   REDIS_PASSWORD: str
   REDIS_DB: int = 0
+  REDIS_MAX_CONNECTIONS: int = 100
+  REDIS_MIN_CONNECTIONS: int = 10
+  REDIS_POOL_TIMEOUT: int = 5
+  # Connections of the pub/sub subscriptions per worker, counted in REDIS_MAX_CONNECTIONS
+  REDIS_SUBSCRIBER_CONNECTIONS: int = 4
   
   CACHE_EXPIRE_MINUTES: int | float
+  CACHE_TTL_SECONDS: int = 300
+  TEACHER_CACHE_SIZE: int = 10000
   
+  # Attempts per client IP and per username on the authentication endpoints
+  RATE_LIMIT_ENABLED: bool = True
+  RATE_LIMIT_WINDOW_SECONDS: int = 60
+  RATE_LIMIT_PER_IP: int = 30
+  RATE_LIMIT_PER_USERNAME: int = 10
+
+  # Password hashing pool settings
+  HASH_POOL: Literal["thread", "process"] = "thread"
+  HASH_WORKERS: int = os.cpu_count() or 1
+  HASH_QUEUE_SIZE: int = 64
+
   # JWT settings
   JWT_ALGORITHM: str = "RS256"
   JWT_EXPIRE_MINUTES: int | float
+  JWT_CACHE_SIZE: int = 10000
+  # Revocation filter: initial revoked tokens per expiry bucket (5 minutes), doubled as it fills, and false positive rate
+  JWT_REVOCATION_FILTER_CAPACITY: int = 1000
+  JWT_REVOCATION_FILTER_ERROR_RATE: float = 0.001
+  # Signing keys: a directory of `<kid>.pem` files and/or a single PEM key
+  JWT_KEYS_DIR: Optional[str] = None
+  JWT_PRIVATE_KEY: Optional[str] = None
+  JWT_PRIVATE_KEY_KID: str = "env"
+  JWT_ACTIVE_KID: Optional[str] = None
+
+  # Prometheus metrics at `/metrics`, off by default as they are served on the API port.
+  # Scrapes must send `Authorization: Bearer <METRICS_TOKEN>` if set
+  METRICS_ENABLED: bool = False
+  METRICS_TOKEN: Optional[str] = None
   
   scopes: Dict[str, Any] = {
     "student": "",
@@ -57,15 +94,35 @@ class Settings(BaseSettings):
 
   SECRET_KEY: str = secrets.token_hex(32)
 
-  PRIVATE_KEY_PEM: bytes = private_key.private_bytes(
-    encoding=serialization.Encoding.PEM,
-    format=serialization.PrivateFormat.PKCS8,
-    encryption_algorithm=serialization.NoEncryption()
-  )
-    
-  PUBLIC_KEY_PEM: bytes = private_key.public_key().public_bytes(
-    encoding=serialization.Encoding.PEM,
-    format=serialization.PublicFormat.SubjectPublicKeyInfo
-  )
+  # The connection pool sizes are totals, shared out between the workers
+  @property
+  def workers(self) -> int:
+    return self.WORKERS or 1
+
+  @property
+  def max_workers(self) -> int:
+    """
+    The most workers whose pools of at least `WORKER_MIN_POOL_SIZE` fit in the totals.
+    """
+    return max(1, min(
+      self.MONGO_MAX_POOL_SIZE // self.WORKER_MIN_POOL_SIZE,
+      self.REDIS_MAX_CONNECTIONS // (self.WORKER_MIN_POOL_SIZE + self.REDIS_SUBSCRIBER_CONNECTIONS)
+    ))
+
+  @property
+  def mongo_max_pool_size(self) -> int:
+    return self.MONGO_MAX_POOL_SIZE // self.workers
+
+  @property
+  def mongo_min_pool_size(self) -> int:
+    return min(self.MONGO_MIN_POOL_SIZE // self.workers, self.mongo_max_pool_size)
+
+  @property
+  def redis_max_connections(self) -> int:
+    return max(1, self.REDIS_MAX_CONNECTIONS // self.workers - self.REDIS_SUBSCRIBER_CONNECTIONS)
+
+  @property
+  def redis_min_connections(self) -> int:
+    return min(self.REDIS_MIN_CONNECTIONS // self.workers, self.redis_max_connections)
 
 settings = Settings()
\ No newline at end of file
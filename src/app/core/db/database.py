@@ -6,7 +6,9 @@ from pymongo.errors import (
     OperationFailure
 )
 from typing import Optional
+import asyncio
 
+from core.metrics import MongoCommandListener
 from core.logger import logger
 from core.config import settings
 
@@ -35,11 +37,12 @@ class MongoClient:
         try:
             cls._client = AsyncMongoClient(
                 f"mongodb+srv://{settings.MONGO_USERNAME}:{settings.MONGO_PASSWORD}@{settings.MONGO_HOSTNAME}.mongodb.net/{settings.MONGO_DATABASE}",
-                maxPoolSize=settings.MONGO_MAX_POOL_SIZE,
-                minPoolSize=settings.MONGO_MIN_POOL_SIZE,
+                maxPoolSize=settings.mongo_max_pool_size,
+                minPoolSize=settings.mongo_min_pool_size,
                 connectTimeoutMS=settings.MONGO_CONNECT_TIMEOUT_MS,
                 serverSelectionTimeoutMS=settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
-                retryWrites=settings.MONGO_RETRY_WRITES
+                retryWrites=settings.MONGO_RETRY_WRITES,
+                event_listeners=[MongoCommandListener()]
             )
             await cls._client.admin.command("ping")
             logger.info("[+] Successfully connected to MongoDB.")
@@ -48,6 +51,14 @@ class MongoClient:
                 {"msg": "[x] Failed to connect to MongoDB.", "detail": err})
             return None
 
+    @classmethod
+    async def warm(cls):
+        """
+        Open the minimum connections of the pool.
+        """
+        if cls._client is not None:
+            await asyncio.gather(*(cls._client.admin.command("ping") for _ in range(settings.mongo_min_pool_size)))
+
     @classmethod
     async def close(cls):
         """
@@ -0,0 +1,119 @@
+from pymongo.asynchronous.mongo_client import AsyncMongoClient
+from pymongo.asynchronous.database import AsyncDatabase
+from pymongo.errors import OperationFailure
+from pymongo import IndexModel, ASCENDING
+from typing import NamedTuple, Optional, Tuple, List, Dict
+
+from core.logger import logger
+
+USERS_INDEX = "users_index"
+GROUPS_INDEX = "groups_index"
+TIMETABLE = "teachers_timetable"
+
+USERS_SORT = ("edbo_id",)
+SCHEDULE_SORT = ("date", "position", "lesson_id")
+
+# Applies to every collection of the database without its own entry
+ANY = "*"
+
+class Index(NamedTuple):
+    keys: Tuple[str, ...]
+    unique: bool = False
+    partial: Optional[dict] = None
+
+    def model(self) -> IndexModel:
+        options = {"unique": True} if self.unique else {}
+        if self.partial:
+            options["partialFilterExpression"] = self.partial
+        return IndexModel([(key, ASCENDING) for key in self.keys], **options)
+
+# Emails are optional, so only documents that have one are unique
+EMAIL = Index(("email",), unique=True, partial={"email": {"$type": "string"}})
+
+INDEXES: Dict[str, Dict[str, List[Index]]] = {
+    "users": {
+        USERS_INDEX: [Index(USERS_SORT, unique=True), EMAIL],
+        # Role collections
+        ANY: [Index(USERS_SORT, unique=True), EMAIL, Index(("group",))],
+    },
+    "groups": {
+        GROUPS_INDEX: [Index(("group",), unique=True), Index(("class_teacher_edbo",))],
+        # Degree collections
+        ANY: [Index(("group",), unique=True), Index(("class_teacher_edbo",))],
+    },
+    "grades": {
+        # Group collections
+        ANY: [Index(("edbo_id",), unique=True)],
+    },
+    "schedule": {
+        TIMETABLE: [Index(("lesson_id",), unique=True), Index(("teacher_edbo", *SCHEDULE_SORT))],
+        # Group collections
+        ANY: [Index(("lesson_id",), unique=True), Index(SCHEDULE_SORT), Index(("teacher_edbo",))],
+    },
+}
+
+# Collections indexed by this process
+_ensured: set = set()
+
+def indexes_for(database: str, collection: str) -> List[Index]:
+    """
+    Return the registered indexes of the given collection.
+    """
+    registry = INDEXES.get(database, {})
+    return registry.get(collection, registry.get(ANY, []))
+
+async def ensure_collection(
+        db: AsyncDatabase,
+        name: str
+    ) -> None:
+    """
+    Create the registered indexes of the collection, once per process.
+    """
+    if (db.name, name) in _ensured:
+        return
+    models = [index.model() for index in indexes_for(db.name, name)]
+    if models:
+        # Creating an existing index is a no-op
+        await db.get_collection(name).create_indexes(models)
+    _ensured.add((db.name, name))
+
+async def ensure_indexes(
+        client: AsyncMongoClient
+    ) -> int:
+    """
+    Create the registered indexes of every existing collection and of the directories.
+    """
+    count = 0
+    for database, registry in INDEXES.items():
+        db = client.get_database(database)
+        names = set(await db.list_collection_names()) | (registry.keys() - {ANY})
+        for name in sorted(names):
+            await ensure_collection(db, name)
+            count += 1
+    logger.info(f"[+] Indexes ensured on {count} collections.")
+    return count
+
+async def report_indexes(
+        client: AsyncMongoClient
+    ) -> Dict[str, List[str]]:
+    """
+    Report the registered indexes that are missing and the existing ones never used since the server start.
+    """
+    missing, unused = [], []
+    for database in INDEXES:
+        db = client.get_database(database)
+        for name in await db.list_collection_names():
+            collection = db.get_collection(name)
+            existing = {}
+            async for index in await collection.list_indexes():
+                existing[tuple(index["key"])] = index["name"]
+            for index in indexes_for(database, name):
+                if index.keys not in existing:
+                    missing.append(f"{database}.{name}: {', '.join(index.keys)}")
+            try:
+                async for stats in await collection.aggregate([{"$indexStats": {}}]):
+                    if stats["name"] != "_id_" and not stats["accesses"]["ops"]:
+                        unused.append(f"{database}.{name}: {stats['name']}")
+            except OperationFailure as err:
+                logger.warning({"msg": f"[!] Index usage of {database}.{name} unavailable.", "detail": err})
+    return {"missing": missing, "unused": unused}
@@ -1,12 +1,53 @@
+from redis.asyncio.client import Pipeline
+from redis.commands.core import AsyncScript
 from typing import Optional
 import redis.asyncio as aioredis
+import asyncio
+import weakref
+import time
 
+from core.metrics import REDIS_COMMAND_LATENCY
 from core.logger import logger
 from core.config import settings
 
+class InstrumentedPipeline(Pipeline):
+    """Redis pipeline recording its round trip latency."""
+    async def execute(self, raise_on_error: bool = True):
+        start = time.perf_counter()
+        try:
+            return await super().execute(raise_on_error)
+        finally:
+            REDIS_COMMAND_LATENCY.labels("pipeline").observe(time.perf_counter() - start)
+
+class InstrumentedRedis(aioredis.Redis):
+    """Redis client recording the latency of every command."""
+    async def execute_command(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            REDIS_COMMAND_LATENCY.labels(str(args[0]).lower()).observe(time.perf_counter() - start)
+
+    def pipeline(self, transaction: bool = True, shard_hint: Optional[str] = None) -> Pipeline:
+        return InstrumentedPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
+
+class LuaScript:
+    """Lua script registered once per Redis client, run by its SHA."""
+    def __init__(self, source: str):
+        self.source = source
+        self._scripts: weakref.WeakKeyDictionary[aioredis.Redis, AsyncScript] = weakref.WeakKeyDictionary()
+
+    def __call__(self, redis: aioredis.Redis) -> AsyncScript:
+        script = self._scripts.get(redis)
+        if script is None:
+            script = self._scripts[redis] = redis.register_script(self.source)
+        return script
+
 class RedisClient:
     _instance: Optional["RedisClient"] = None
     _client: Optional[aioredis.Redis] = None
+    # Client of the long-lived pub/sub subscriptions
+    _subscriber: Optional[aioredis.Redis] = None
 
     @classmethod
     def __new__(cls, *args, **kwargs):
@@ -20,15 +61,28 @@ class RedisClient:
         """
         Establish Redis connection.
         """
+        options = dict(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            username=settings.REDIS_USERNAME,
+            password=settings.REDIS_PASSWORD,
+            decode_responses=True,
+            db=settings.REDIS_DB
+        )
         try:
-            cls._client = aioredis.Redis(
-                host=settings.REDIS_HOST,
-                port=settings.REDIS_PORT,
-                username=settings.REDIS_USERNAME,
-                password=settings.REDIS_PASSWORD,
-                decode_responses=True,
-                db=settings.REDIS_DB
+            # Wait for a free connection rather than failing past the worker's share
+            pool = aioredis.BlockingConnectionPool(
+                **options,
+                max_connections=settings.redis_max_connections,
+                timeout=settings.REDIS_POOL_TIMEOUT
             )
+            cls._client = InstrumentedRedis.from_pool(pool)
+            # Each subscription holds a connection for the life of the worker,
+            # keep them out of the request pool
+            cls._subscriber = aioredis.Redis.from_pool(aioredis.ConnectionPool(
+                **options,
+                max_connections=settings.REDIS_SUBSCRIBER_CONNECTIONS
+            ))
             alive = await cls._client.ping()
             if not alive:
                 logger.error(f"Couldn't connect to Redis: {settings.REDIS_HOST}:{settings.REDIS_PORT}.")
@@ -39,11 +93,33 @@ class RedisClient:
             logger.error({ "msg": "An error occured while connecting to Redis.", "detail": err})
             return None
 
+    @classmethod
+    def subscriber(cls) -> Optional[aioredis.Redis]:
+        """
+        Return the client of the pub/sub subscriptions.
+        """
+        return cls._subscriber or cls._client
+
+    @classmethod
+    async def warm(cls):
+        """
+        Open the minimum connections of the pool.
+        """
+        if cls._client is not None:
+            await asyncio.gather(*(cls._client.ping() for _ in range(settings.redis_min_connections)))
+
     @classmethod
     async def close(cls):
         """
         Close Redis connection.
         """
+        if cls._subscriber is not None:
+            try:
+                await cls._subscriber.aclose()
+            except Exception as err:
+                logger.error({"msg": "[x] Error closing Redis subscriber connection.", "detail": err})
+            finally:
+                cls._subscriber = None
         if cls._client is not None:
             try:
                 await cls._client.aclose()
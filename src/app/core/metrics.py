@@ -0,0 +1,189 @@
+from prometheus_client import (
+  CONTENT_TYPE_LATEST,
+  REGISTRY,
+  CollectorRegistry,
+  Counter,
+  Histogram,
+  Gauge,
+  generate_latest,
+  multiprocess
+)
+from pymongo.monitoring import (
+  CommandListener,
+  CommandSucceededEvent,
+  CommandFailedEvent,
+  CommandStartedEvent
+)
+from starlette.types import ASGIApp, Receive, Scope, Send, Message
+from starlette.responses import Response
+from starlette.requests import Request
+from starlette.status import HTTP_401_UNAUTHORIZED
+import secrets
+import time
+import os
+
+from core.config import settings
+
+REQUEST_LATENCY = Histogram(
+  "http_request_duration_seconds",
+  "HTTP request latency by route.",
+  ["method", "route", "status"]
+)
+REQUESTS_IN_FLIGHT = Gauge(
+  "http_requests_in_flight",
+  "HTTP requests being served by route.",
+  ["method", "route"],
+  multiprocess_mode="livesum"
+)
+MONGO_COMMAND_LATENCY = Histogram(
+  "mongo_command_duration_seconds",
+  "MongoDB command latency.",
+  ["command", "status"],
+  buckets=(.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5)
+)
+REDIS_COMMAND_LATENCY = Histogram(
+  "redis_command_duration_seconds",
+  "Redis command latency.",
+  ["command"],
+  buckets=(.0001, .00025, .0005, .001, .0025, .005, .01, .025, .05, .1, .25)
+)
+HASH_LATENCY = Histogram(
+  "password_hash_duration_seconds",
+  "Argon2 hash and verify latency, including the pool queue wait.",
+  ["operation"]
+)
+RATE_LIMIT_REJECTIONS = Counter(
+  "rate_limit_rejections",
+  "Requests rejected by the rate limiter.",
+  ["scope", "kind"]
+)
+
+# Per-worker state is summed over the live workers, so the counters aggregate in multiprocess mode
+HASH_IN_FLIGHT = Gauge(
+  "password_hash_in_flight",
+  "Argon2 jobs running or queued.",
+  multiprocess_mode="livesum"
+)
+HASH_QUEUE_DEPTH = Gauge(
+  "password_hash_queue_depth",
+  "Argon2 jobs waiting for a worker.",
+  multiprocess_mode="livesum"
+)
+HASH_REJECTED = Counter(
+  "password_hash_rejected",
+  "Argon2 jobs rejected by a full pool."
+)
+JWT_CACHE_SIZE = Gauge(
+  "jwt_cache_size",
+  "Verified tokens in the cache.",
+  multiprocess_mode="livesum"
+)
+JWT_CACHE_LOOKUPS = Counter(
+  "jwt_cache_lookups",
+  "Verified token cache lookups.",
+  ["result"]
+)
+JTI_FILTER_BUCKETS = Gauge(
+  "jti_filter_buckets",
+  "Live expiry buckets of the revocation filter.",
+  multiprocess_mode="livemax"
+)
+JTI_FILTER_BYTES = Gauge(
+  "jti_filter_bytes",
+  "Memory of the revocation filter bits.",
+  multiprocess_mode="livesum"
+)
+JTI_FILTER_CHECKS = Counter(
+  "jti_filter_checks",
+  "Revocation filter checks.",
+  ["result"]
+)
+TEACHER_CACHE_SIZE = Gauge(
+  "teacher_cache_size",
+  "Teacher profiles in the cache.",
+  multiprocess_mode="livesum"
+)
+TEACHER_CACHE_LOOKUPS = Counter(
+  "teacher_cache_lookups",
+  "Teacher profiles cache lookups.",
+  ["result"]
+)
+RESPONSE_CACHE_LOOKUPS = Counter(
+  "response_cache_lookups",
+  "Response cache lookups.",
+  ["namespace", "result"]
+)
+
+class MongoCommandListener(CommandListener):
+  """
+  Records the latency and outcome of every MongoDB command.
+  """
+  def started(self, event: CommandStartedEvent) -> None:
+    pass
+
+  def succeeded(self, event: CommandSucceededEvent) -> None:
+    MONGO_COMMAND_LATENCY.labels(event.command_name, "succeeded").observe(event.duration_micros / 1e6)
+
+  def failed(self, event: CommandFailedEvent) -> None:
+    MONGO_COMMAND_LATENCY.labels(event.command_name, "failed").observe(event.duration_micros / 1e6)
+
+def _route(scope: Scope) -> str:
+  # Route template of the request, e.g. `/api/v1/users/read/{edbo_id}`, set on the scope by the matched route
+  return getattr(scope.get("route"), "path", "unmatched")
+
+async def track_in_flight(request: Request):
+  """
+  Counts the requests being served by the matched route, as an app dependency.
+  """
+  in_flight = REQUESTS_IN_FLIGHT.labels(request.method, _route(request.scope))
+  in_flight.inc()
+  try:
+    yield
+  finally:
+    in_flight.dec()
+
+class MetricsMiddleware:
+  """
+  Records the latency of every route.
+  """
+  def __init__(self, app: ASGIApp):
+    self.app = app
+
+  async def __call__(self, scope: Scope, receive: Receive, send: Send):
+    if scope["type"] != "http":
+      return await self.app(scope, receive, send)
+
+    status = 500
+    async def send_wrapper(message: Message):
+      nonlocal status
+      if message["type"] == "http.response.start":
+        status = message["status"]
+      await send(message)
+
+    start = time.perf_counter()
+    try:
+      await self.app(scope, receive, send_wrapper)
+    finally:
+      # The route is only known once the router has matched it
+      REQUEST_LATENCY.labels(scope["method"], _route(scope), str(status)).observe(time.perf_counter() - start)
+
+async def metrics(request: Request) -> Response:
+  """
+  Prometheus metrics endpoint, behind the `METRICS_TOKEN` bearer token if set.
+  """
+  if settings.METRICS_TOKEN and not secrets.compare_digest(
+      request.headers.get("Authorization", ""), f"Bearer {settings.METRICS_TOKEN}"):
+    return Response(status_code=HTTP_401_UNAUTHORIZED, headers={"WWW-Authenticate": "Bearer"})
+  registry = REGISTRY
+  if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+    # Aggregate the metrics of all workers
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+  return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+
+def mark_process_dead() -> None:
+  """
+  Drops the live gauges of the exiting worker from the aggregated metrics.
+  """
+  if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+    multiprocess.mark_process_dead(os.getpid())
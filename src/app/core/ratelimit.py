@@ -0,0 +1,50 @@
+from redis.asyncio import Redis
+from typing import Dict
+import uuid
+import math
+
+from core.db.redis import LuaScript
+
+# Sliding window log per key: the window is checked for every key first,
+# and the attempt is recorded in all of them only if none is over its limit
+_HIT_SCRIPT = LuaScript("""
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local window = tonumber(ARGV[1])
+local retry, rejected = {}, false
+for i, key in ipairs(KEYS) do
+  redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+  retry[i] = 0
+  if redis.call('ZCARD', key) >= tonumber(ARGV[i + 2]) then
+    local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+    retry[i] = math.max(tonumber(oldest[2]) + window - now, 1)
+    rejected = true
+  end
+end
+if not rejected then
+  for _, key in ipairs(KEYS) do
+    redis.call('ZADD', key, now, ARGV[2])
+    redis.call('PEXPIRE', key, window)
+  end
+end
+return retry
+""")
+
+class RateLimiter:
+  """
+    Sliding-window rate limiter in Redis, atomic across workers and nodes.
+  """
+  prefix = "ratelimit"
+
+  @classmethod
+  async def hit(cls, redis: Redis, *, scope: str, limits: Dict[str, tuple[str, int]], window: int) -> Dict[str, int]:
+    """
+    Records an attempt against the `limits` (kind: (identity, limit)) of `scope`
+    within `window` seconds, unless one of them is exceeded.
+    Returns the seconds to wait per exceeded kind, empty if allowed.
+    """
+    kinds = list(limits)
+    retry = await _HIT_SCRIPT(redis)(
+      keys=[f"{cls.prefix}:{scope}:{kind}:{limits[kind][0]}" for kind in kinds],
+      args=[window * 1000, uuid.uuid4().hex, *(limits[kind][1] for kind in kinds)])
+    return {kind: math.ceil(int(ms) / 1000) for kind, ms in zip(kinds, retry) if int(ms) > 0}
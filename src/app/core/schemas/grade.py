@@ -1,9 +1,55 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, BeforeValidator, Field
+from typing import Annotated, Optional, Literal, List
+
+from .schedule import lesson_day
+
+# Grades are keyed by the lesson day, `YYYY-MM-DD`
+GradeDay = Annotated[str, BeforeValidator(lesson_day)]
 
 class GradeBase(BaseModel):
     subject: str
-    date: Optional[str] = None
+    date: Optional[GradeDay] = None
 
 class SetGrade(GradeBase):
-    grade: int
\ No newline at end of file
+    grade: int
+
+class StudentGrade(BaseModel):
+    edbo_id: int
+    grade: int
+
+class SetGrades(BaseModel):
+    subject: str
+    date: GradeDay
+    grades: List[StudentGrade] = Field(..., min_length=1, max_length=500)
+
+class GradeResult(BaseModel):
+    edbo_id: int
+    status: Literal["updated", "not_found", "failed"]
+    detail: Optional[str] = None
+
+class SubjectAverage(BaseModel):
+    subject: str
+    average: float
+    count: int
+
+class StudentGPA(BaseModel):
+    edbo_id: int
+    gpa: Optional[float] = None
+    count: int = 0
+    subjects: List[SubjectAverage] = []
+
+class GradeCount(BaseModel):
+    grade: int
+    count: int
+
+class SubjectStats(BaseModel):
+    subject: str
+    count: int
+    mean: float
+    median: float
+    distribution: List[GradeCount]
+
+class RankingEntry(BaseModel):
+    edbo_id: int
+    gpa: float
+    count: int
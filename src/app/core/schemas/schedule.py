@@ -1,22 +1,47 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, BeforeValidator
+from datetime import date, datetime, time
+from typing import Annotated, Optional
 
 from .teacher import TeacherBase
 
+def parse_lesson_date(value) -> datetime:
+  """
+  Parse a lesson date (`YYYY-MM-DD`, `DD.MM.YYYY` or ISO datetime) into a midnight datetime.
+  """
+  if isinstance(value, str):
+    try:
+      value = datetime.fromisoformat(value)
+    except ValueError:
+      value = datetime.strptime(value, "%d.%m.%Y")
+  if isinstance(value, datetime):
+    value = value.date()
+  if isinstance(value, date):
+    return datetime.combine(value, time.min)
+  raise ValueError(f"Invalid lesson date: {value!r}")
+
+# Lessons are stored by day, the `position` orders them within it
+LessonDate = Annotated[datetime, BeforeValidator(parse_lesson_date)]
+
+def lesson_day(value) -> str:
+  """
+  Key of the lesson day in the grades documents.
+  """
+  return parse_lesson_date(value).strftime("%Y-%m-%d")
+
 class ScheduleBase(BaseModel):
   subject: str
   position: int
   classroom: int
-  date: str
+  date: LessonDate
   topic: str
   homework: str
 
 class ScheduleCreate(ScheduleBase):
   group: str
-  date: str
+  date: LessonDate
 
 class SchedulePrivate(ScheduleCreate):
   teacher: Optional[TeacherBase] = None 
   teacher_edbo: Optional[int] = None
   grade: Optional[int] = None
-  lesson_id: str
\ No newline at end of file
+  lesson_id: str
@@ -1,19 +1,83 @@
 from datetime import datetime, timedelta, timezone
+from collections import OrderedDict
 from redis.asyncio import Redis
 from typing import Optional
+import hashlib
+import time
 import uuid
 import jwt
 
+from core.security.revocation import BLACKLIST_PREFIX, REVOCATIONS_CHANNEL, RevocationFilter
+from core.security.keys import KeyRing
+from core.cache import SessionCache
+from core.metrics import JWT_CACHE_SIZE, JWT_CACHE_LOOKUPS
 from core.logger import logger
 from core.config import settings
 
 # https://www.iana.org/assignments/jwt/jwt.xhtml#claims
 
+class TokenCache:
+  """
+    Bounded LRU cache of verified JWT payloads, keyed by token digest.
+    Entries expire together with the token (`exp` claim).
+  """
+  def __init__(self, maxsize: int):
+    self.maxsize = maxsize
+    self.hits = 0
+    self.misses = 0
+    self._entries: OrderedDict[str, dict] = OrderedDict()
+
+  @staticmethod
+  def digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+  def get(self, key: str) -> Optional[dict]:
+    """
+    Returns a copy of the cached payload, if present and not expired.
+    """
+    payload = self._entries.get(key)
+    if payload is None:
+      self.misses += 1
+      JWT_CACHE_LOOKUPS.labels("miss").inc()
+      return None
+    if payload["exp"] <= time.time():
+      del self._entries[key]
+      JWT_CACHE_SIZE.set(len(self._entries))
+      self.misses += 1
+      JWT_CACHE_LOOKUPS.labels("miss").inc()
+      return None
+    self._entries.move_to_end(key)
+    self.hits += 1
+    JWT_CACHE_LOOKUPS.labels("hit").inc()
+    return dict(payload)
+
+  def set(self, key: str, payload: dict) -> None:
+    """
+    Stores a verified payload, evicting the least recently used entry.
+    """
+    if self.maxsize <= 0 or "exp" not in payload:
+      return
+    self._entries[key] = dict(payload)
+    self._entries.move_to_end(key)
+    while len(self._entries) > self.maxsize:
+      self._entries.popitem(last=False)
+    JWT_CACHE_SIZE.set(len(self._entries))
+
+  def metrics(self) -> dict:
+    return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
 class OAuthJWTBearer:
   """
     JSON Web Token (JWT) is a compact, URL-safe means of representing
     claims to be transferred between two parties.
   """
+  cache = TokenCache(maxsize=settings.JWT_CACHE_SIZE)
+
+  @staticmethod
+  def _sign(payload: dict) -> str:
+    kid, key = KeyRing.signing_key()
+    return jwt.encode(payload=payload, key=key, algorithm=settings.JWT_ALGORITHM, headers={"kid": kid})
+
   @staticmethod
   def encode(payload: dict) -> dict:
     """Encodes a given payload into a JWT,
@@ -30,19 +94,28 @@ class OAuthJWTBearer:
       "exp": datetime.now(tz=timezone.utc) + timedelta(minutes=settings.JWT_EXPIRE_MINUTES),
       "iat": datetime.now(tz=timezone.utc)})
     return {
-      "jwt": jwt.encode(payload=payload, key=settings.PRIVATE_KEY_PEM, algorithm=settings.JWT_ALGORITHM),
+      "jwt": OAuthJWTBearer._sign(payload),
       "jti": jti
     }
   
-  @staticmethod
-  def decode(token: str) -> Optional[dict]:
+  @classmethod
+  def decode(cls, token: str) -> Optional[dict]:
     """
     Decodes a JWT, returning the payload.
+    Verified payloads are cached until the token expires.
     """
+    digest = cls.cache.digest(token)
+    if (payload := cls.cache.get(digest)) is not None:
+      return payload
     try:
-      return jwt.decode(jwt=token, key=settings.PUBLIC_KEY_PEM, algorithms=settings.JWT_ALGORITHM)
+      key = KeyRing.verifying_key(jwt.get_unverified_header(token).get("kid"))
+      if key is None:
+        return None
+      payload = jwt.decode(jwt=token, key=key, algorithms=settings.JWT_ALGORITHM)
     except (jwt.DecodeError, jwt.ExpiredSignatureError):
       return None
+    cls.cache.set(digest, payload)
+    return payload
       
   @staticmethod
   async def refresh(payload: dict) -> str:
@@ -51,7 +124,7 @@ class OAuthJWTBearer:
     """
     payload.update(
       {"exp": datetime.now(tz=timezone.utc) + timedelta(minutes=settings.JWT_EXPIRE_MINUTES)})
-    return jwt.encode(payload=payload, key=settings.PRIVATE_KEY_PEM, algorithm=settings.JWT_ALGORITHM)
+    return OAuthJWTBearer._sign(payload)
   
   @staticmethod
   async def add_jti_to_blacklist(redis: Redis, *, jti: str, exp: int) -> bool:
@@ -64,13 +137,54 @@ class OAuthJWTBearer:
       logger.warning(f"Token with jti={jti} is already expired. Skipping blacklist.")
       return False
       
-    # Store blacklist entry
-    await redis.setex(f"auth:blacklist:jti:{jti}", ttl, "Revoked")
+    # Store blacklist entry and notify the revocation filters
+    RevocationFilter.add(jti, exp)
+    async with redis.pipeline(transaction=False) as pipe:
+      pipe.setex(f"{BLACKLIST_PREFIX}{jti}", ttl, "Revoked")
+      pipe.publish(REVOCATIONS_CHANNEL, f"{exp}:{jti}")
+      await pipe.execute()
     return True
+
+  @staticmethod
+  async def revoke_jti(redis: Redis, *, jti: str, exp: int) -> bool:
+    """
+    Adds `jti` to the blacklist unless it is already there, in a single command.
+    Returns `False` if the token is expired or has already been revoked.
+    """
+    now = int(datetime.now(tz=timezone.utc).timestamp())
+    ttl = exp - now
+    if ttl <= 0:
+      logger.warning(f"Token with jti={jti} is already expired. Skipping blacklist.")
+      return False
+    RevocationFilter.add(jti, exp)
+    async with redis.pipeline(transaction=False) as pipe:
+      pipe.set(f"{BLACKLIST_PREFIX}{jti}", "Revoked", ex=ttl, nx=True)
+      pipe.publish(REVOCATIONS_CHANNEL, f"{exp}:{jti}")
+      revoked, _ = await pipe.execute()
+    return bool(revoked)
   
   @staticmethod
   async def is_jti_in_blacklist(redis: Redis, *, jti: str) -> bool:
     """
-    Checks if the `jti` is in blacklist.
+    Checks if the `jti` is in blacklist, asking Redis only on a revocation filter hit.
+    """
+    if not RevocationFilter.might_contain(jti):
+      return False
+    return await redis.exists(f"{BLACKLIST_PREFIX}{jti}")
+
+  @staticmethod
+  async def get_session(redis: Redis, *, jti: str, username: str) -> tuple[bool, Optional[dict]]:
+    """
+    Checks if the `jti` is in blacklist and reads the cached user session
+    of `username`, sliding its expiry, pipelined into a single round trip.
+    The blacklist is only read on a revocation filter hit.
     """
-    return await redis.exists(f"auth:blacklist:jti:{jti}")
\ No newline at end of file
+    key = SessionCache.key(username)
+    check = RevocationFilter.might_contain(jti)
+    async with redis.pipeline(transaction=False) as pipe:
+      if check:
+        pipe.exists(f"{BLACKLIST_PREFIX}{jti}")
+      pipe.hgetall(key)
+      pipe.expire(key, SessionCache.ttl)
+      *revoked, session, _ = await pipe.execute()
+    return bool(revoked and revoked[0]), SessionCache.decode(session) if session else None
@@ -0,0 +1,92 @@
+from cryptography.hazmat.primitives.asymmetric.rsa import RSAPrivateKey, RSAPublicKey
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.hazmat.primitives import serialization
+from typing import Optional, Dict, Tuple
+from datetime import datetime, timezone
+from pathlib import Path
+
+from core.logger import logger
+from core.config import settings
+
+def generate_private_key() -> RSAPrivateKey:
+  """
+  Generates a new RSA-2048 signing key.
+  """
+  return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+def private_key_to_pem(key: RSAPrivateKey) -> bytes:
+  """
+  Serializes a signing key into an unencrypted PKCS8 PEM.
+  """
+  return key.private_bytes(
+    encoding=serialization.Encoding.PEM,
+    format=serialization.PrivateFormat.PKCS8,
+    encryption_algorithm=serialization.NoEncryption()
+  )
+
+def new_kid() -> str:
+  """
+  Returns a key id that sorts after the ids of the older keys.
+  """
+  return datetime.now(tz=timezone.utc).strftime("%Y%m%d%H%M%S")
+
+class KeyRing:
+  """
+    JWT signing keys, loaded once on first use.
+
+    Every key in `JWT_KEYS_DIR` (`<kid>.pem`) and `JWT_PRIVATE_KEY`
+    (`JWT_PRIVATE_KEY_KID`) is accepted for verification. Tokens are signed
+    with `JWT_ACTIVE_KID` if set, else with the newest key of `JWT_KEYS_DIR`,
+    else with `JWT_PRIVATE_KEY`. Without configured keys an ephemeral
+    development key is generated.
+  """
+  _private_keys: Optional[Dict[str, RSAPrivateKey]] = None
+  _public_keys: Optional[Dict[str, RSAPublicKey]] = None
+  _active_kid: Optional[str] = None
+
+  @classmethod
+  def load(cls) -> None:
+    """
+    Loads the configured signing keys.
+    """
+    keys: Dict[str, RSAPrivateKey] = {}
+    if settings.JWT_KEYS_DIR:
+      for path in sorted(Path(settings.JWT_KEYS_DIR).glob("*.pem")):
+        keys[path.stem] = serialization.load_pem_private_key(path.read_bytes(), password=None)
+    # The key ids of the directory sort by age
+    active_kid = settings.JWT_ACTIVE_KID or (max(keys) if keys else None)
+    if settings.JWT_PRIVATE_KEY:
+      kid = settings.JWT_PRIVATE_KEY_KID
+      if kid in keys:
+        raise ValueError(f"JWT key '{kid}' is both in JWT_KEYS_DIR and JWT_PRIVATE_KEY.")
+      keys[kid] = serialization.load_pem_private_key(settings.JWT_PRIVATE_KEY.encode(), password=None)
+      active_kid = active_kid or kid
+    if not keys:
+      logger.warning("No JWT signing keys configured. Generating an ephemeral development key.")
+      active_kid = new_kid()
+      keys[active_kid] = generate_private_key()
+
+    if active_kid not in keys:
+      raise ValueError(f"Active JWT key '{active_kid}' not found.")
+
+    cls._private_keys = keys
+    cls._public_keys = {kid: key.public_key() for kid, key in keys.items()}
+    cls._active_kid = active_kid
+
+  @classmethod
+  def signing_key(cls) -> Tuple[str, RSAPrivateKey]:
+    """
+    Returns the active key id and signing key.
+    """
+    if cls._private_keys is None:
+      cls.load()
+    return cls._active_kid, cls._private_keys[cls._active_kid]
+
+  @classmethod
+  def verifying_key(cls, kid: Optional[str]) -> Optional[RSAPublicKey]:
+    """
+    Returns the public key of `kid`, the active key if `kid` is missing.
+    """
+    if cls._public_keys is None:
+      cls.load()
+    return cls._public_keys.get(kid or cls._active_kid)
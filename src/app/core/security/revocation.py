@@ -0,0 +1,195 @@
+from redis.exceptions import RedisError
+from redis.asyncio import Redis
+from typing import Dict, Iterator, List, Optional
+import hashlib
+import asyncio
+import math
+import time
+
+from core.metrics import JTI_FILTER_BUCKETS, JTI_FILTER_BYTES, JTI_FILTER_CHECKS
+from core.logger import logger
+from core.config import settings
+
+BLACKLIST_PREFIX = "auth:blacklist:jti:"
+REVOCATIONS_CHANNEL = "auth:revocations"
+
+class BloomFilter:
+  """
+    Fixed-size Bloom filter of strings, sized for `capacity` items.
+  """
+  __slots__ = ("capacity", "count", "size", "hashes", "bits")
+
+  def __init__(self, capacity: int, error_rate: float):
+    self.capacity = capacity
+    self.count = 0
+    self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+    self.hashes = max(1, round(self.size / capacity * math.log(2)))
+    self.bits = bytearray((self.size + 7) // 8)
+
+  @property
+  def full(self) -> bool:
+    return self.count >= self.capacity
+
+  def _positions(self, item: str) -> Iterator[int]:
+    # Double hashing over the two halves of a single digest
+    digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+    h1, h2 = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+    return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+  def add(self, item: str) -> None:
+    for position in self._positions(item):
+      self.bits[position >> 3] |= 1 << (position & 7)
+    self.count += 1
+
+  def __contains__(self, item: str) -> bool:
+    return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+class RevocationFilter:
+  """
+    Per-worker Bloom filter of the revoked JTIs, in front of the Redis blacklist.
+
+    Revocations are published on the `auth:revocations` channel. JTIs are
+    bucketed by token expiry, and a bucket is dropped once all its tokens
+    have expired. Until the filter is seeded and subscribed, every JTI
+    is reported as possibly revoked, so Redis stays the source of truth.
+
+    A bucket starts with a Bloom filter of `capacity` items and adds one
+    of twice the capacity whenever the last one is full, so its memory
+    follows the revocation rate. The error rates of the added filters
+    halve, keeping the bucket within `error_rate`.
+  """
+  capacity: int = settings.JWT_REVOCATION_FILTER_CAPACITY
+  error_rate: float = settings.JWT_REVOCATION_FILTER_ERROR_RATE
+  bucket_seconds: int = 300
+  positives: int = 0
+  negatives: int = 0
+  # Bloom filters by the end of their expiry bucket
+  _buckets: Dict[int, List[BloomFilter]] = {}
+  _ready: bool = False
+  _listener: Optional[asyncio.Task] = None
+
+  @classmethod
+  def add(cls, jti: str, exp: int) -> None:
+    """
+    Adds the `jti` of a token expiring at `exp`.
+    """
+    bucket = -(-int(exp) // cls.bucket_seconds) * cls.bucket_seconds
+    if bucket <= time.time():
+      return
+    blooms = cls._buckets.setdefault(bucket, [])
+    if not blooms or blooms[-1].full:
+      blooms.append(BloomFilter(cls.capacity << len(blooms), cls.error_rate / 2 ** (len(blooms) + 1)))
+      cls._observe()
+    blooms[-1].add(jti)
+
+  @classmethod
+  def might_contain(cls, jti: str) -> bool:
+    """
+    Returns `False` only if the `jti` is certainly not revoked.
+    """
+    if not cls._ready:
+      return True
+    now = time.time()
+    if expired := [bucket for bucket in cls._buckets if bucket <= now]:
+      for bucket in expired:
+        del cls._buckets[bucket]
+      cls._observe()
+    if any(jti in bloom for blooms in cls._buckets.values() for bloom in blooms):
+      cls.positives += 1
+      JTI_FILTER_CHECKS.labels("positive").inc()
+      return True
+    cls.negatives += 1
+    JTI_FILTER_CHECKS.labels("negative").inc()
+    return False
+
+  @classmethod
+  def _observe(cls):
+    metrics = cls.metrics()
+    JTI_FILTER_BUCKETS.set(metrics["buckets"])
+    JTI_FILTER_BYTES.set(metrics["bytes"])
+
+  @classmethod
+  async def seed(cls, redis: Redis) -> int:
+    """
+    Adds the JTIs of the blacklist entries.
+    """
+    count, keys = 0, []
+    async for key in redis.scan_iter(match=f"{BLACKLIST_PREFIX}*", count=1000):
+      keys.append(key)
+      if len(keys) >= 1000:
+        count += await cls._seed_batch(redis, keys)
+        keys = []
+    if keys:
+      count += await cls._seed_batch(redis, keys)
+    return count
+
+  @classmethod
+  async def _seed_batch(cls, redis: Redis, keys: list) -> int:
+    async with redis.pipeline(transaction=False) as pipe:
+      for key in keys:
+        pipe.ttl(key)
+      ttls = await pipe.execute()
+    now = int(time.time())
+    for key, ttl in zip(keys, ttls):
+      if ttl > 0:
+        cls.add(key.removeprefix(BLACKLIST_PREFIX), now + ttl)
+    return len(keys)
+
+  @classmethod
+  async def _listen(cls, redis: Redis, subscribed: asyncio.Event):
+    while True:
+      pubsub = redis.pubsub(ignore_subscribe_messages=True)
+      try:
+        await pubsub.subscribe(REVOCATIONS_CHANNEL)
+        # Seed once subscribed, so no revocation falls in between
+        count = await cls.seed(redis)
+        cls._ready = True
+        subscribed.set()
+        logger.info(f"[+] Revocation filter seeded: {count} revoked tokens.")
+        async for message in pubsub.listen():
+          try:
+            exp, jti = message["data"].split(":", 1)
+            exp = int(exp)
+          except (AttributeError, TypeError, ValueError):
+            logger.warning({"msg": "[!] Invalid revocation skipped.", "detail": message["data"]})
+            continue
+          cls.add(jti, exp)
+      except (RedisError, OSError) as err:
+        # Revocations may be missed until subscribed again
+        cls._ready = False
+        logger.warning({"msg": "[!] Revocation filter subscription lost.", "detail": err})
+        await asyncio.sleep(1)
+      finally:
+        cls._ready = False
+        await pubsub.aclose()
+
+  @classmethod
+  async def start(cls, redis: Redis) -> None:
+    """
+    Subscribes to the revocations and seeds the filter.
+    """
+    subscribed = asyncio.Event()
+    cls._listener = asyncio.create_task(cls._listen(redis, subscribed))
+    try:
+      await asyncio.wait_for(subscribed.wait(), timeout=5)
+    except asyncio.TimeoutError:
+      logger.warning("[!] Revocation filter not ready, checking the blacklist in Redis.")
+
+  @classmethod
+  async def stop(cls) -> None:
+    cls._ready = False
+    if cls._listener is not None:
+      cls._listener.cancel()
+      try:
+        await cls._listener
+      except asyncio.CancelledError:
+        pass
+      cls._listener = None
+
+  @classmethod
+  def metrics(cls) -> dict:
+    return {
+      "buckets": len(cls._buckets),
+      "bytes": sum(len(bloom.bits) for blooms in cls._buckets.values() for bloom in blooms),
+      "positives": cls.positives,
+      "negatives": cls.negatives}
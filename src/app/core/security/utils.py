@@ -1,18 +1,115 @@
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from fastapi import HTTPException, status
 from passlib.context import CryptContext
+from typing import Optional, Callable, Any
+import asyncio
+import time
+
+from core.metrics import HASH_LATENCY, HASH_IN_FLIGHT, HASH_QUEUE_DEPTH, HASH_REJECTED
+from core.config import settings
+
+def _hash(plain: str) -> str:
+    return Hash.context.hash(secret=plain)
+
+def _verify(plain: str, hashed: str) -> bool:
+    return Hash.context.verify(secret=plain, hash=hashed)
 
 class Hash:
     context = CryptContext(schemes=["argon2"], deprecated="auto")
 
+    _executor: Optional[Executor] = None
+    _in_flight: int = 0
+    _completed: int = 0
+    _rejected: int = 0
+    _latency_total: float = 0.0
+    _latency_max: float = 0.0
+
     @classmethod
     def hash(cls, plain: str) -> str:
         """
         Return hashed password.
         """
-        return cls.context.hash(secret=plain)
+        return _hash(plain)
             
     @classmethod
     def verify(cls, plain: str, hashed: str) -> bool:
         """
         Return bool type of the verified password.
         """
-        return cls.context.verify(secret=plain, hash=hashed)
\ No newline at end of file
+        return _verify(plain, hashed)
+
+    @classmethod
+    async def ahash(cls, plain: str) -> str:
+        """
+        Return hashed password, computed on the hashing pool.
+        """
+        return await cls._run("hash", _hash, plain)
+
+    @classmethod
+    async def averify(cls, plain: str, hashed: str) -> bool:
+        """
+        Return bool type of the verified password, computed on the hashing pool.
+        """
+        return await cls._run("verify", _verify, plain, hashed)
+
+    @classmethod
+    def metrics(cls) -> dict:
+        """
+        Return the hashing pool queue depth and latency metrics.
+        """
+        return {
+            "workers": settings.HASH_WORKERS,
+            "in_flight": cls._in_flight,
+            "queue_depth": max(0, cls._in_flight - settings.HASH_WORKERS),
+            "completed": cls._completed,
+            "rejected": cls._rejected,
+            "latency_avg_ms": cls._latency_total / cls._completed * 1000 if cls._completed else 0.0,
+            "latency_max_ms": cls._latency_max * 1000
+        }
+
+    @classmethod
+    def close(cls):
+        """
+        Shut down the hashing pool.
+        """
+        if cls._executor is not None:
+            cls._executor.shutdown(wait=False, cancel_futures=True)
+            cls._executor = None
+
+    @classmethod
+    def _get_executor(cls) -> Executor:
+        if cls._executor is None:
+            pool = ProcessPoolExecutor if settings.HASH_POOL == "process" else ThreadPoolExecutor
+            cls._executor = pool(max_workers=settings.HASH_WORKERS)
+        return cls._executor
+
+    @classmethod
+    def _observe(cls):
+        HASH_IN_FLIGHT.set(cls._in_flight)
+        HASH_QUEUE_DEPTH.set(max(0, cls._in_flight - settings.HASH_WORKERS))
+
+    @classmethod
+    async def _run(cls, operation: str, func: Callable[..., Any], *args) -> Any:
+        # Reject the work once the pool queue is full
+        if cls._in_flight >= settings.HASH_WORKERS + settings.HASH_QUEUE_SIZE:
+            cls._rejected += 1
+            HASH_REJECTED.inc()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="The server is busy. Try again later.",
+                headers={"Retry-After": "1"}
+            )
+        cls._in_flight += 1
+        cls._observe()
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(cls._get_executor(), func, *args)
+        finally:
+            latency = time.perf_counter() - start
+            cls._in_flight -= 1
+            cls._observe()
+            cls._completed += 1
+            cls._latency_total += latency
+            cls._latency_max = max(cls._latency_max, latency)
+            HASH_LATENCY.labels(operation).observe(latency)
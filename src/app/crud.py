@@ -1,36 +1,166 @@
+from pymongo.asynchronous.collection import AsyncCollection
 from pymongo.asynchronous.database import AsyncDatabase
+from pymongo.asynchronous.cursor import AsyncCursor
+from pymongo.errors import DuplicateKeyError
+from pymongo import UpdateOne, ReplaceOne, ASCENDING
 from fastapi import HTTPException, status
-from typing import Optional, List, Dict, Any
+from typing import Optional, Sequence, List, Dict, Any, get_args
+from datetime import date, datetime, time, timedelta
+from redis.asyncio import Redis
+from bson import json_util
+import base64
 
 from core.config import settings
+from core.logger import logger
+from core.cache import RedisCache, SessionCache
+from core.db.indexes import (
+    USERS_INDEX,
+    GROUPS_INDEX,
+    TIMETABLE,
+    USERS_SORT,
+    ensure_collection,
+)
 from core.security.utils import Hash
+from core.schemas.group import GroupCreate
+from core.schemas.schedule import parse_lesson_date, lesson_day
+from loaders import TeacherProfiles
 from core.schemas.user import (
+    ROLE,
     UserBase,
     UserCreate,
 )
-      
+
+
+def _username_filter(username: int | str) -> dict:
+    return {"edbo_id": int(username)} if isinstance(username, int) or username.isdigit() else {"email": username}
+
+async def invalidate_cache(redis: Redis, *namespaces: str) -> None:
+    """
+    Invalidate the cached responses of the given namespaces.
+    """
+    await RedisCache.invalidate(redis, *namespaces)
+
+async def invalidate_user_caches(redis: Redis, role: str) -> None:
+    """
+    Invalidate the cached responses embedding the accounts of `role`.
+    """
+    # Group disciplines embed the teacher profiles
+    await invalidate_cache(redis, f"users:{role}", *(["groups"] if role == "teachers" else []))
+
+async def sync_session(redis: Redis, user: dict, *, deleted: bool = False) -> None:
+    """
+    Write the updated `user` through to its live session, or drop it if `deleted`.
+    """
+    if deleted:
+        await SessionCache.invalidate(redis, user["edbo_id"])
+    else:
+        await SessionCache.replace(redis, user)
+
+async def invalidate_teacher_profiles(redis: Redis, edbo_id: Optional[int] = None) -> None:
+    """
+    Invalidate the cached teacher profile of `edbo_id` in every worker, all of them if `None`.
+    """
+    await TeacherProfiles.publish(redis, edbo_id)
+
 async def get_user_by_username(
         db: AsyncDatabase,
         *,
         username: int | str,
         exclude: Optional[list] = None
-    ) -> dict:
+    ) -> Optional[dict]:
     """
     Find user by `username`. 
     """
-    for name in await db.list_collection_names():
-        collection = db.get_collection(name)
-        user = await collection.find_one(
-            {"edbo_id": int(username)} if isinstance(username, int) or username.isdigit() else {"email": username}) 
-        if user: break
-    if exclude:
+    # Resolve the role collection from the users directory
+    entry = await db.get_collection(USERS_INDEX).find_one(
+        _username_filter(username), {"_id": 0, "edbo_id": 1, "role": 1})
+    if entry:
+        user = await db.get_collection(entry["role"]).find_one({"edbo_id": entry["edbo_id"]})
+    else:
+        user = await _find_unindexed_user(db, username=username)
+    if user and exclude:
       for key in exclude:
-        user.pop(key)
+        user.pop(key, None)
     return user
 
+async def _find_unindexed_user(
+        db: AsyncDatabase,
+        *,
+        username: int | str
+    ) -> Optional[dict]:
+    """
+    Find user by `username` in the role collections, backfilling its users directory entry.
+    """
+    # Accounts created before the directory, until `rebuild-users-index` is run
+    for role in get_args(ROLE):
+        user = await db.get_collection(role).find_one(_username_filter(username))
+        if user:
+            try:
+                await index_user(db, user={**user, "role": role})
+            except DuplicateKeyError as err:
+                logger.warning({"msg": "[!] Failed to backfill the users directory entry.", "detail": err})
+            return user
+    return None
+
+def _index_entry(user: dict) -> UpdateOne:
+    update = {"$set": {"role": user["role"]}}
+    if user.get("email"):
+        update["$set"]["email"] = user["email"]
+    else:
+        update["$unset"] = {"email": ""}
+    return UpdateOne({"edbo_id": user["edbo_id"]}, update, upsert=True)
+
+async def index_user(
+        db: AsyncDatabase,
+        *,
+        user: dict
+    ) -> None:
+    """
+    Upsert the users directory entry of the given user document.
+    """
+    await index_users(db, users=[user])
+
+async def index_users(
+        db: AsyncDatabase,
+        *,
+        users: List[dict]
+    ) -> None:
+    """
+    Upsert the users directory entries of the given user documents.
+    """
+    if users:
+        await db.get_collection(USERS_INDEX).bulk_write(
+            [_index_entry(user) for user in users], ordered=False)
+
+async def rebuild_users_index(
+        db: AsyncDatabase
+    ) -> int:
+    """
+    Rebuild the users directory from the role collections.
+    """
+    index = db.get_collection(USERS_INDEX)
+    await ensure_collection(db, USERS_INDEX)
+    
+    edbo_ids = []
+    for role in await db.list_collection_names():
+        if role == USERS_INDEX:
+            continue
+        collection = db.get_collection(role)
+        entries = []
+        async for user in collection.find({}, {"_id": 0, "edbo_id": 1, "email": 1}):
+            entries.append(_index_entry({**user, "role": role}))
+            edbo_ids.append(user["edbo_id"])
+        if entries:
+            await index.bulk_write(entries, ordered=False)
+    
+    # Drop entries of the removed accounts
+    await index.delete_many({"edbo_id": {"$nin": edbo_ids}})
+    return len(edbo_ids)
+
 async def create_user(
         db: AsyncDatabase,
         *,
+        redis: Redis,
         user: UserCreate
     ) -> bool:
     """
@@ -43,25 +173,103 @@ async def create_user(
             detail="User already exits."
         )
     collection = db.get_collection(user.role)
-    user.password = Hash.hash(plain=user.password)
-    await collection.insert_one(user.model_dump())
+    user.password = await Hash.ahash(plain=user.password)
+    user_doc = user.model_dump()
+    await collection.insert_one(user_doc)
+    await index_user(db, user=user_doc)
+    await invalidate_user_caches(redis, user.role)
     raise HTTPException(
         status_code=status.HTTP_201_CREATED,
         detail="User created successfully."
     )
 
+def encode_cursor(
+        document: dict,
+        *,
+        keys: Sequence[str]
+    ) -> str:
+    """
+    Encode the sort key values of `document` into an opaque page cursor.
+    """
+    data = json_util.dumps({key: document.get(key) for key in keys})
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+def decode_cursor(
+        cursor: str,
+        *,
+        keys: Sequence[str]
+    ) -> dict:
+    """
+    Decode a page cursor into the sort key values.
+    """
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json_util.loads(data)
+        return {key: values[key] for key in keys}
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor."
+        )
+
+def find_page(
+        collection: AsyncCollection,
+        filter: dict,
+        *,
+        keys: Sequence[str],
+        limit: Optional[int] = None,
+        after: Optional[str] = None,
+        projection: Optional[dict] = None
+    ) -> AsyncCursor:
+    """
+    Return a cursor over the documents sorted by `keys`, starting
+    after the page cursor `after` and limited to `limit` documents.
+    """
+    if after:
+        values = decode_cursor(after, keys=keys)
+        # (k1 > v1) or (k1 = v1 and k2 > v2) or ...
+        clauses = []
+        for i, key in enumerate(keys):
+            clause = {prev: values[prev] for prev in keys[:i]}
+            clause[key] = {"$gt": values[key]}
+            clauses.append(clause)
+        filter = {"$and": [filter, clauses[0] if len(clauses) == 1 else {"$or": clauses}]}
+    cursor = collection.find(
+        filter, projection,
+        sort=[(key, ASCENDING) for key in keys],
+        batch_size=settings.MONGO_BATCH_SIZE)
+    return cursor.limit(limit) if limit else cursor
+
+def find_users(
+        db: AsyncDatabase,
+        *,
+        role: str,
+        filter: Any,
+        value: Any,
+        limit: Optional[int] = None,
+        after: Optional[str] = None
+    ) -> AsyncCursor:
+    """
+    Return a cursor over all users sorted by `edbo_id`, without passwords.
+    """
+    collection = db.get_collection(role)
+    return find_page(
+        collection, {filter: value} if filter and value else {},
+        keys=USERS_SORT, limit=limit, after=after, projection={"password": 0})
+
 async def read_users(
         db: AsyncDatabase,
         *,
         role: str,
         filter: Any,
         value: Any,
+        limit: Optional[int] = None,
+        after: Optional[str] = None
     ) -> List[UserBase]:
     """
     Read all users.
     """
-    collection = db.get_collection(role)
-    return await collection.find({filter: value} if filter and value else {}).to_list()
+    return await find_users(db, role=role, filter=filter, value=value, limit=limit, after=after).to_list()
     
 async def read_user(
         db: AsyncDatabase, 
@@ -82,6 +290,7 @@ async def read_user(
 async def update_all_users(
         db: AsyncDatabase,
         *,
+        redis: Redis,
         role: str,
         update_doc: dict
     ):
@@ -90,6 +299,10 @@ async def update_all_users(
     """
     collection = db.get_collection(role)
     await collection.update_many({}, update={"$set": update_doc})
+    await SessionCache.invalidate_role(redis, role)
+    await invalidate_user_caches(redis, role)
+    if role == "teachers":
+        await invalidate_teacher_profiles(redis)
     raise HTTPException(
         status_code=status.HTTP_200_OK,
         detail="User accounts has been updated."
@@ -98,6 +311,7 @@ async def update_all_users(
 async def update_user(
         db: AsyncDatabase,
         *,
+        redis: Redis,
         edbo_id: int,
         update_doc: dict
     ):
@@ -115,6 +329,12 @@ async def update_user(
         filter={"edbo_id": edbo_id},
         update={"$set": update_doc}
     )
+    if "email" in update_doc:
+        await index_user(db, user={**user, **update_doc})
+    await sync_session(redis, {**user, **update_doc})
+    await invalidate_user_caches(redis, user.get("role"))
+    if user.get("role") == "teachers":
+        await invalidate_teacher_profiles(redis, edbo_id)
     raise HTTPException(
         status_code=status.HTTP_200_OK,
         detail="The user account has been updated."
@@ -123,6 +343,7 @@ async def update_user(
 async def delete_user(
         db: AsyncDatabase,
         *,
+        redis: Redis,
         edbo_id: int
     ):
     """
@@ -135,7 +356,12 @@ async def delete_user(
             detail="User not found."
         )
     collection = db.get_collection(user.get("role"))
-    d = await collection.delete_one({"edbo_id": edbo_id})
+    await collection.delete_one({"edbo_id": edbo_id})
+    await db.get_collection(USERS_INDEX).delete_one({"edbo_id": edbo_id})
+    await sync_session(redis, user, deleted=True)
+    await invalidate_user_caches(redis, user.get("role"))
+    if user.get("role") == "teachers":
+        await invalidate_teacher_profiles(redis, edbo_id)
     raise HTTPException(
         status_code=status.HTTP_200_OK,
         detail="The user account has been deleted"
@@ -152,7 +378,7 @@ async def authenticate_user(
     Authenticate user credentials.
     """ 
     user = await get_user_by_username(db, username=username)
-    if not user or not Hash.verify(plain_pwd, user.get("password")):
+    if not user or not await Hash.averify(plain_pwd, user.get("password")):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Couldn't validate credentials",
@@ -170,6 +396,224 @@ async def authenticate_user(
         user.pop(key) 
     return user
 
+async def get_group(
+        db: AsyncDatabase,
+        *,
+        name: Optional[str] = None,
+        class_teacher_edbo: Optional[int] = None
+    ) -> Optional[dict]:
+    """
+    Find the group by `name` or `class_teacher_edbo`.
+    """
+    # Resolve the degree collection from the groups directory
+    query = {"group": name} if name is not None else {"class_teacher_edbo": class_teacher_edbo}
+    entry = await db.get_collection(GROUPS_INDEX).find_one(
+        query, {"_id": 0, "group": 1, "degree": 1})
+    if not entry:
+        return None
+    collection = db.get_collection(entry["degree"])
+    return await collection.find_one({"group": entry["group"]})
+
+async def create_group(
+        db: AsyncDatabase,
+        *,
+        redis: Redis,
+        group: GroupCreate
+    ) -> None:
+    """
+    Create a new group in the degree collection.
+    """
+    try:
+        await db.get_collection(GROUPS_INDEX).insert_one(
+            {"group": group.group, "degree": group.degree, "class_teacher_edbo": group.class_teacher_edbo})
+    except DuplicateKeyError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Group already exits."
+        )
+    collection = db.get_collection(group.degree)
+    await collection.insert_one(group.model_dump())
+    await invalidate_cache(redis, "groups")
+
+async def delete_group(
+        db: AsyncDatabase,
+        *,
+        redis: Redis,
+        name: str
+    ) -> bool:
+    """
+    Delete the group from the degree collection by `name`.
+    """
+    entry = await db.get_collection(GROUPS_INDEX).find_one_and_delete({"group": name})
+    if not entry:
+        return False
+    collection = db.get_collection(entry["degree"])
+    await collection.delete_one({"group": name})
+    await invalidate_cache(redis, "groups")
+    return True
+
+async def rebuild_groups_index(
+        db: AsyncDatabase
+    ) -> int:
+    """
+    Rebuild the groups directory from the degree collections.
+    """
+    index = db.get_collection(GROUPS_INDEX)
+    await ensure_collection(db, GROUPS_INDEX)
+
+    names = []
+    for degree in await db.list_collection_names():
+        if degree == GROUPS_INDEX:
+            continue
+        collection = db.get_collection(degree)
+        entries = []
+        async for group in collection.find({}, {"_id": 0, "group": 1, "class_teacher_edbo": 1}):
+            entries.append(UpdateOne(
+                {"group": group["group"]},
+                {"$set": {"degree": degree, "class_teacher_edbo": group.get("class_teacher_edbo")}},
+                upsert=True))
+            names.append(group["group"])
+        if entries:
+            await index.bulk_write(entries, ordered=False)
+
+    # Drop entries of the removed groups
+    await index.delete_many({"group": {"$nin": names}})
+    return len(names)
+
+def date_range(
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        week: Optional[date] = None
+    ) -> dict:
+    """
+    Return the lesson `date` filter of the given (inclusive) range of days,
+    or of the week (Monday to Sunday) of the day `week`.
+    """
+    if week is not None:
+        date_from = week - timedelta(days=week.weekday())
+        date_to = date_from + timedelta(days=6)
+    bounds = {}
+    if date_from is not None:
+        bounds["$gte"] = datetime.combine(date_from, time.min)
+    if date_to is not None:
+        bounds["$lt"] = datetime.combine(date_to + timedelta(days=1), time.min)
+    return {"date": bounds} if bounds else {}
+
+async def migrate_lesson_dates(
+        db: AsyncDatabase
+    ) -> Dict[str, int]:
+    """
+    Convert the string lesson dates of the schedule collections into datetimes.
+    """
+    converted, failed = 0, 0
+    for name in await db.list_collection_names():
+        collection = db.get_collection(name)
+        requests = []
+        async for lesson in collection.find({"date": {"$type": "string"}}, {"_id": 1, "date": 1}):
+            try:
+                requests.append(UpdateOne({"_id": lesson["_id"]}, {"$set": {"date": parse_lesson_date(lesson["date"])}}))
+            except ValueError:
+                logger.warning(f"[!] Invalid lesson date {lesson['date']!r} in schedule.{name}.")
+                failed += 1
+            if len(requests) >= settings.MONGO_BATCH_SIZE:
+                await collection.bulk_write(requests, ordered=False)
+                converted += len(requests)
+                requests = []
+        if requests:
+            await collection.bulk_write(requests, ordered=False)
+            converted += len(requests)
+        await ensure_collection(db, name)
+    return {"converted": converted, "failed": failed}
+
+def _grade_days(records: dict, prefix: str = "") -> Dict[str, Any]:
+    # Dotted dates were split into nested fields on write, e.g. {"18": {"10": {"2026": 5}}}
+    days = {}
+    for key, value in records.items():
+        if isinstance(value, dict):
+            days.update(_grade_days(value, f"{prefix}{key}."))
+        else:
+            days[f"{prefix}{key}"] = value
+    return days
+
+async def migrate_grade_dates(
+        db: AsyncDatabase
+    ) -> Dict[str, int]:
+    """
+    Rewrite the grade days of the grades collections as the `YYYY-MM-DD` lesson days.
+    """
+    converted, failed = 0, 0
+    for name in await db.list_collection_names():
+        collection = db.get_collection(name)
+        requests = []
+        async for grades_doc in collection.find({}, {"_id": 1, "disciplines": 1}):
+            disciplines = grades_doc.get("disciplines") or {}
+            migrated = {}
+            for subject, records in disciplines.items():
+                migrated[subject] = {}
+                for key, value in records.items():
+                    try:
+                        days = {lesson_day(day): grade for day, grade in _grade_days({key: value}).items()}
+                    except ValueError:
+                        logger.warning(f"[!] Invalid grade date {key!r} in grades.{name}.")
+                        failed += 1
+                        migrated[subject][key] = value
+                        continue
+                    for day, grade in days.items():
+                        # Grades already keyed by the lesson day take precedence
+                        if day == key or day not in migrated[subject]:
+                            migrated[subject][day] = grade
+            if migrated != disciplines:
+                requests.append(UpdateOne({"_id": grades_doc["_id"]}, {"$set": {"disciplines": migrated}}))
+            if len(requests) >= settings.MONGO_BATCH_SIZE:
+                await collection.bulk_write(requests, ordered=False)
+                converted += len(requests)
+                requests = []
+        if requests:
+            await collection.bulk_write(requests, ordered=False)
+            converted += len(requests)
+    return {"converted": converted, "failed": failed}
+
+async def sync_timetable(
+        db: AsyncDatabase,
+        *,
+        lesson_id: str,
+        lesson: Optional[dict]
+    ) -> None:
+    """
+    Upsert the teachers timetable copy of the lesson, or remove it if `lesson` is `None`.
+    """
+    collection = db.get_collection(TIMETABLE)
+    if lesson is None:
+        await collection.delete_one({"lesson_id": lesson_id})
+        return
+    lesson = {key: value for key, value in lesson.items() if key != "_id"}
+    await collection.replace_one({"lesson_id": lesson_id}, lesson, upsert=True)
+
+async def rebuild_timetable(
+        db: AsyncDatabase
+    ) -> int:
+    """
+    Rebuild the teachers timetable from the group schedule collections.
+    """
+    timetable = db.get_collection(TIMETABLE)
+    await ensure_collection(db, TIMETABLE)
+
+    lesson_ids = []
+    for group in await db.list_collection_names():
+        if group == TIMETABLE:
+            continue
+        collection = db.get_collection(group)
+        entries = []
+        async for lesson in collection.find({}, {"_id": 0}):
+            entries.append(ReplaceOne({"lesson_id": lesson["lesson_id"]}, {"group": group, **lesson}, upsert=True))
+            lesson_ids.append(lesson["lesson_id"])
+        if entries:
+            await timetable.bulk_write(entries, ordered=False)
+
+    # Drop the removed lessons
+    await timetable.delete_many({"lesson_id": {"$nin": lesson_ids}})
+    return len(lesson_ids)
+
 async def get_grades(
         db: AsyncDatabase, 
         *,
@@ -190,4 +634,100 @@ async def get_grades(
     result = {}
     for subject, records in disciplines.items():
         result[subject] = records.get(date) if date else records
-    return result
\ No newline at end of file
+    return result
+
+def _flatten_grades(match: dict, subject: Optional[str] = None) -> List[dict]:
+    # One document per grade: {edbo_id, subject, grade}
+    pipeline = [
+        {"$match": match},
+        {"$project": {"_id": 0, "edbo_id": 1, "subjects": {"$objectToArray": {"$ifNull": ["$disciplines", {}]}}}},
+        {"$unwind": "$subjects"},
+        {"$project": {"edbo_id": 1, "subject": "$subjects.k", "grades": {"$objectToArray": "$subjects.v"}}},
+        {"$unwind": "$grades"},
+        {"$project": {"edbo_id": 1, "subject": 1, "grade": "$grades.v"}},
+        {"$match": {"grade": {"$type": "number"}}},
+    ]
+    if subject:
+        pipeline.append({"$match": {"subject": subject}})
+    return pipeline
+
+def _median(distribution: List[dict], count: int) -> float:
+    # Median of the grades given as a sorted {grade, count} distribution
+    def nth(n: int) -> int:
+        seen = 0
+        for entry in distribution:
+            seen += entry["count"]
+            if n < seen:
+                return entry["grade"]
+    return (nth((count - 1) // 2) + nth(count // 2)) / 2
+
+async def get_student_gpa(
+        db: AsyncDatabase,
+        *,
+        edbo_id: int,
+        group: str
+    ) -> dict:
+    """
+    Get the student's per-subject averages and GPA.
+    """
+    collection = db.get_collection(group)
+    subjects = await (await collection.aggregate([
+        *_flatten_grades({"edbo_id": edbo_id}),
+        {"$group": {"_id": "$subject", "total": {"$sum": "$grade"}, "count": {"$sum": 1}}},
+        {"$sort": {"_id": 1}},
+    ])).to_list()
+    total, count = sum(s["total"] for s in subjects), sum(s["count"] for s in subjects)
+    return {
+        "edbo_id": edbo_id,
+        "gpa": total / count if count else None,
+        "count": count,
+        "subjects": [
+            {"subject": s["_id"], "average": s["total"] / s["count"], "count": s["count"]} for s in subjects]
+    }
+
+async def get_subject_stats(
+        db: AsyncDatabase,
+        *,
+        group: str
+    ) -> List[dict]:
+    """
+    Get the group's per-subject grade mean, median and distribution.
+    """
+    collection = db.get_collection(group)
+    subjects = await (await collection.aggregate([
+        *_flatten_grades({}),
+        {"$group": {"_id": {"subject": "$subject", "grade": "$grade"}, "count": {"$sum": 1}}},
+        {"$sort": {"_id.grade": 1}},
+        {"$group": {
+            "_id": "$_id.subject",
+            "count": {"$sum": "$count"},
+            "total": {"$sum": {"$multiply": ["$_id.grade", "$count"]}},
+            "distribution": {"$push": {"grade": "$_id.grade", "count": "$count"}}}},
+        {"$sort": {"_id": 1}},
+    ])).to_list()
+    return [{
+        "subject": s["_id"],
+        "count": s["count"],
+        "mean": s["total"] / s["count"],
+        "median": _median(s["distribution"], s["count"]),
+        "distribution": s["distribution"]
+    } for s in subjects]
+
+async def get_grades_ranking(
+        db: AsyncDatabase,
+        *,
+        group: str,
+        limit: int,
+        subject: Optional[str] = None
+    ) -> List[dict]:
+    """
+    Get the group's top students by average grade.
+    """
+    collection = db.get_collection(group)
+    return await (await collection.aggregate([
+        *_flatten_grades({}, subject=subject),
+        {"$group": {"_id": "$edbo_id", "gpa": {"$avg": "$grade"}, "count": {"$sum": 1}}},
+        {"$sort": {"gpa": -1, "_id": 1}},
+        {"$limit": limit},
+        {"$project": {"_id": 0, "edbo_id": "$_id", "gpa": 1, "count": 1}},
+    ])).to_list()
@@ -0,0 +1,214 @@
+from pymongo.asynchronous.database import AsyncDatabase
+from pymongo.errors import BulkWriteError
+from typing import Any, AsyncIterator, BinaryIO, Dict, Iterable, Iterator, List, NamedTuple, Type, get_origin
+from pydantic import BaseModel, ValidationError
+from fastapi import HTTPException
+from redis.asyncio import Redis
+import tempfile
+import asyncio
+import pickle
+import json
+import csv
+import io
+
+from core.config import settings
+from core.security.utils import Hash
+from core.schemas.student import StudentCreate
+from core.schemas.teacher import TeacherCreate
+import crud
+
+IMPORT_MODELS: Dict[str, Type[BaseModel]] = {
+    "students": StudentCreate,
+    "teachers": TeacherCreate,
+}
+
+# Separator of the list values in CSV cells, e.g. "math;physics"
+CSV_LIST_SEPARATOR = ";"
+
+# Parsed upload rows are kept in memory up to this size, then on disk
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+def detect_format(filename: str) -> str:
+    """
+    Return the import format from the file extension.
+    """
+    extension = filename.rsplit(".", 1)[-1].lower()
+    if extension == "csv":
+        return "csv"
+    if extension in ("jsonl", "ndjson"):
+        return "jsonl"
+    if extension == "json":
+        return "json"
+    raise ValueError(f"Unsupported file format: '{filename}'.")
+
+class InvalidRow(NamedTuple):
+    """
+    A row of the import file that could not be parsed.
+    """
+    detail: str
+
+def read_rows(file: BinaryIO, *, format: str) -> Iterator[Any]:
+    """
+    Stream the user rows of a CSV, JSON Lines or JSON array file.
+    Unparsable JSON Lines rows are yielded as `InvalidRow`.
+    Raises `ValueError` if the file itself can't be read.
+    """
+    if format == "json":
+        # A JSON array is parsed as a whole
+        rows = json.load(file)
+        if not isinstance(rows, list):
+            raise ValueError("A JSON import file must hold an array of users.")
+        yield from rows
+        return
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    try:
+        if format == "jsonl":
+            for line in text:
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError as err:
+                    yield InvalidRow(f"Invalid JSON: {err}")
+            return
+        # Treat empty cells as missing values
+        for row in csv.DictReader(text):
+            yield {key: value for key, value in row.items() if value not in ("", None)}
+    except (csv.Error, UnicodeDecodeError) as err:
+        raise ValueError(f"Invalid {format.upper()} file: {err}")
+    finally:
+        # Leave the upload to its owner
+        text.detach()
+
+def spool_rows(file: BinaryIO, *, format: str) -> tempfile.SpooledTemporaryFile:
+    """
+    Parse the rows of the file into a spooled temporary file, read back by `spooled_rows`.
+    Raises `ValueError` if the file itself can't be read.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    try:
+        for row in read_rows(file, format=format):
+            pickle.dump(row, spool, protocol=pickle.HIGHEST_PROTOCOL)
+    except BaseException:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool
+
+def spooled_rows(spool: tempfile.SpooledTemporaryFile) -> Iterator[Any]:
+    """
+    Stream the rows of a file written by `spool_rows`, closing it once read.
+    """
+    with spool:
+        while True:
+            try:
+                yield pickle.load(spool)
+            except EOFError:
+                return
+
+def _coerce_lists(row: dict, model: Type[BaseModel]) -> dict:
+    for name, field in model.model_fields.items():
+        value = row.get(name)
+        if isinstance(value, str) and (field.annotation is list or get_origin(field.annotation) is list):
+            row[name] = [item.strip() for item in value.split(CSV_LIST_SEPARATOR) if item.strip()]
+    return row
+
+def _validation_detail(err: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in err.errors())
+
+async def _hash_passwords(users: List[BaseModel]) -> Dict[int, str]:
+    # Hash on the worker pool, keeping at most one job per worker in flight
+    semaphore = asyncio.Semaphore(settings.HASH_WORKERS)
+    errors = {}
+    async def hash_password(index: int, user: BaseModel):
+        async with semaphore:
+            try:
+                user.password = await Hash.ahash(plain=user.password)
+            except HTTPException as err:
+                errors[index] = err.detail
+    await asyncio.gather(*(hash_password(index, user) for index, user in enumerate(users)))
+    return errors
+
+async def import_users(
+        db: AsyncDatabase,
+        redis: Redis,
+        rows: Iterable[dict],
+        *,
+        role: str,
+        batch_size: int = settings.IMPORT_BATCH_SIZE
+    ) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Import user accounts in batches, yielding the progress after every batch.
+    The last progress report has `done` set and the per-row `errors`.
+    """
+    model = IMPORT_MODELS[role]
+    collection = db.get_collection(role)
+    report = {"done": False, "processed": 0, "created": 0, "failed": 0}
+    errors: List[dict] = []
+    seen: set = set()
+
+    def fail(row: int, edbo_id: Any, detail: str):
+        errors.append({"row": row, "edbo_id": edbo_id, "detail": detail})
+        report["failed"] += 1
+
+    async def flush(batch: List[tuple]):
+        # Check the duplicates of the whole batch with one query
+        existing = set()
+        cursor = db.get_collection(crud.USERS_INDEX).find(
+            {"$or": [
+                {"edbo_id": {"$in": [user.edbo_id for _, user in batch]}},
+                {"email": {"$in": [email for _, user in batch if (email := getattr(user, "email", None))]}}]},
+            {"_id": 0, "edbo_id": 1, "email": 1})
+        async for entry in cursor:
+            existing.update((entry.get("edbo_id"), entry.get("email")))
+        existing.discard(None)
+        users = []
+        for row, user in batch:
+            if user.edbo_id in existing or getattr(user, "email", None) in existing:
+                fail(row, user.edbo_id, "User already exits.")
+            else:
+                users.append((row, user))
+
+        hash_errors = await _hash_passwords([user for _, user in users])
+        for index in sorted(hash_errors):
+            fail(users[index][0], users[index][1].edbo_id, hash_errors[index])
+        users = [entry for index, entry in enumerate(users) if index not in hash_errors]
+        if not users:
+            return
+
+        documents = [user.model_dump() for _, user in users]
+        failed = set()
+        try:
+            await collection.insert_many(documents, ordered=False)
+        except BulkWriteError as err:
+            for error in err.details.get("writeErrors", []):
+                failed.add(error["index"])
+                fail(users[error["index"]][0], users[error["index"]][1].edbo_id, error.get("errmsg"))
+        created = [document for index, document in enumerate(documents) if index not in failed]
+        await crud.index_users(db, users=created)
+        await crud.invalidate_user_caches(redis, role)
+        report["created"] += len(created)
+
+    batch: List[tuple] = []
+    for row, data in enumerate(rows, start=1):
+        report["processed"] += 1
+        if not isinstance(data, dict):
+            fail(row, None, data.detail if isinstance(data, InvalidRow) else "Row is not a JSON object.")
+            continue
+        try:
+            user = model.model_validate(_coerce_lists({**data, "role": role}, model))
+        except ValidationError as err:
+            fail(row, data.get("edbo_id"), _validation_detail(err))
+            continue
+        if user.edbo_id in seen:
+            fail(row, user.edbo_id, "Duplicate row in the import file.")
+            continue
+        seen.add(user.edbo_id)
+        batch.append((row, user))
+        if len(batch) >= batch_size:
+            await flush(batch)
+            batch = []
+            yield dict(report)
+    if batch:
+        await flush(batch)
+    yield {**report, "done": True, "errors": errors}
@@ -0,0 +1,240 @@
+from pymongo.asynchronous.database import AsyncDatabase
+from typing import NamedTuple, Optional, Iterable, Dict
+from collections import OrderedDict
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+import asyncio
+
+from core.schemas.teacher import TeacherBase
+from core.metrics import TEACHER_CACHE_SIZE, TEACHER_CACHE_LOOKUPS
+from core.config import settings
+from core.logger import logger
+
+TEACHERS_CHANNEL = "cache:teachers:invalidate"
+
+# Invalidates every cached profile
+ALL = "*"
+
+class TeacherRecord(NamedTuple):
+  """
+  Compact, immutable copy of the `TeacherBase` fields.
+  """
+  edbo_id: int
+  first_name: str
+  middle_name: str
+  last_name: str
+  date_of_birth: str
+  role: str
+  disciplines: tuple
+  specialities: tuple
+
+  @classmethod
+  def from_document(cls, document: dict) -> "TeacherRecord":
+    return cls(**{
+      field: tuple(document[field]) if field in ("disciplines", "specialities") else document[field]
+      for field in cls._fields})
+
+  def profile(self) -> TeacherBase:
+    return TeacherBase.model_construct(
+      **{**self._asdict(), "disciplines": list(self.disciplines), "specialities": list(self.specialities)})
+
+class TeacherProfiles:
+  """
+  Per-worker bounded LRU of teacher profiles, warmed at startup.
+
+  Writes to teacher accounts publish their `edbo_id` on the
+  `cache:teachers:invalidate` channel, every worker drops the entry.
+  """
+  maxsize: int = settings.TEACHER_CACHE_SIZE
+  hits: int = 0
+  misses: int = 0
+  _entries: OrderedDict[int, TeacherRecord] = OrderedDict()
+  # Bumped on every invalidation, guards against caching profiles read before it
+  _generation: int = 0
+  _listener: Optional[asyncio.Task] = None
+
+  @classmethod
+  def get(cls, edbo_id: int) -> Optional[TeacherBase]:
+    record = cls._entries.get(edbo_id)
+    if record is None:
+      cls.misses += 1
+      TEACHER_CACHE_LOOKUPS.labels("miss").inc()
+      return None
+    cls._entries.move_to_end(edbo_id)
+    cls.hits += 1
+    TEACHER_CACHE_LOOKUPS.labels("hit").inc()
+    return record.profile()
+
+  @classmethod
+  def put(cls, document: dict, *, generation: int) -> bool:
+    """
+    Caches the profile read at `generation`, unless invalidated since.
+    Malformed teacher documents are skipped.
+    """
+    if cls.maxsize <= 0 or generation != cls._generation:
+      return False
+    try:
+      record = TeacherRecord.from_document(document)
+    except (KeyError, TypeError) as err:
+      logger.warning({"msg": "[!] Malformed teacher profile not cached.", "detail": repr(err), "edbo_id": document.get("edbo_id")})
+      return False
+    cls._entries[record.edbo_id] = record
+    cls._entries.move_to_end(record.edbo_id)
+    while len(cls._entries) > cls.maxsize:
+      cls._entries.popitem(last=False)
+    TEACHER_CACHE_SIZE.set(len(cls._entries))
+    return True
+
+  @classmethod
+  def generation(cls) -> int:
+    return cls._generation
+
+  @classmethod
+  def invalidate(cls, edbo_id: Optional[int] = None) -> None:
+    """
+    Drops the profile of `edbo_id`, or all profiles.
+    """
+    cls._generation += 1
+    if edbo_id is None:
+      cls._entries.clear()
+    else:
+      cls._entries.pop(edbo_id, None)
+    TEACHER_CACHE_SIZE.set(len(cls._entries))
+
+  @classmethod
+  def disable(cls) -> None:
+    """
+    Drops all profiles and stops caching, profiles are then read from MongoDB.
+    """
+    cls.maxsize = 0
+    cls.invalidate()
+
+  @classmethod
+  async def publish(cls, redis: Redis, edbo_id: Optional[int] = None) -> None:
+    """
+    Invalidates the profile of `edbo_id`, or all profiles, in every worker.
+    """
+    cls.invalidate(edbo_id)
+    await redis.publish(TEACHERS_CHANNEL, ALL if edbo_id is None else str(edbo_id))
+
+  @classmethod
+  async def warm(cls, db: AsyncDatabase) -> int:
+    """
+    Loads up to `maxsize` teacher profiles.
+    """
+    generation = cls._generation
+    cursor = db.get_collection("teachers").find(
+      {}, TeacherLoader.projection, batch_size=settings.MONGO_BATCH_SIZE).limit(cls.maxsize)
+    count = 0
+    async for teacher in cursor:
+      count += cls.put(teacher, generation=generation)
+    return count
+
+  @classmethod
+  async def _listen(cls, redis: Redis, subscribed: asyncio.Event):
+    try:
+      while True:
+        pubsub = redis.pubsub(ignore_subscribe_messages=True)
+        try:
+          await pubsub.subscribe(TEACHERS_CHANNEL)
+          # Invalidations may have been missed while unsubscribed
+          if subscribed.is_set():
+            cls.invalidate()
+          subscribed.set()
+          async for message in pubsub.listen():
+            try:
+              edbo_id = None if message["data"] == ALL else int(message["data"])
+            except (TypeError, ValueError):
+              logger.warning({"msg": "[!] Invalid teacher profiles invalidation skipped.", "detail": message["data"]})
+              continue
+            cls.invalidate(edbo_id)
+        except (RedisError, OSError) as err:
+          cls.invalidate()
+          logger.warning({"msg": "[!] Teacher profiles subscription lost.", "detail": err})
+          await asyncio.sleep(1)
+        finally:
+          await pubsub.aclose()
+    except Exception as err:
+      logger.error({"msg": "[x] Teacher profiles listener failed, serving from MongoDB.", "detail": err})
+    finally:
+      # Without invalidations the profiles could go stale
+      cls.disable()
+
+  @classmethod
+  async def start(cls, redis: Redis, db: AsyncDatabase) -> None:
+    """
+    Subscribes to the invalidations and warms the cache.
+    """
+    cls.maxsize = settings.TEACHER_CACHE_SIZE
+    subscribed = asyncio.Event()
+    cls._listener = asyncio.create_task(cls._listen(redis, subscribed))
+    try:
+      await asyncio.wait_for(subscribed.wait(), timeout=5)
+    except asyncio.TimeoutError:
+      # Without invalidations the profiles could go stale
+      logger.warning("[!] Teacher profiles cache not subscribed, serving from MongoDB.")
+      cls.disable()
+      return
+    try:
+      count = await cls.warm(db)
+      logger.info(f"[+] Teacher profiles cache warmed: {count} profiles.")
+    except Exception as err:
+      # A cold cache is served from MongoDB, it must not abort the startup
+      logger.error({"msg": "[x] Failed to warm the teacher profiles cache.", "detail": err})
+
+  @classmethod
+  async def stop(cls) -> None:
+    if cls._listener is not None:
+      cls._listener.cancel()
+      try:
+        await cls._listener
+      except asyncio.CancelledError:
+        pass
+      cls._listener = None
+
+  @classmethod
+  def metrics(cls) -> dict:
+    return {"size": len(cls._entries), "hits": cls.hits, "misses": cls.misses}
+
+class TeacherLoader:
+  """
+  Request-scoped batch loader of teacher profiles.
+
+  Serves the profiles from `TeacherProfiles`, resolving the rest with a
+  single `$in` query and caching the results for the lifetime of the request.
+  The profiles were validated on write, so they are constructed as is.
+  """
+  projection = {"_id": 0, **{field: 1 for field in TeacherBase.model_fields}}
+
+  def __init__(self, db: AsyncDatabase):
+    self._collection = db.get_collection("teachers")
+    self._cache: Dict[int, Optional[TeacherBase]] = {}
+
+  async def load_many(self, edbo_ids: Iterable[int]) -> Dict[int, Optional[TeacherBase]]:
+    """
+    Return the teacher profiles by `edbo_id`, `None` for unknown teachers.
+    """
+    edbo_ids = list(edbo_ids)
+    missing = set()
+    for edbo_id in edbo_ids:
+      if edbo_id not in self._cache:
+        profile = TeacherProfiles.get(edbo_id)
+        if profile is None:
+          missing.add(edbo_id)
+        else:
+          self._cache[edbo_id] = profile
+    if missing:
+      generation = TeacherProfiles.generation()
+      cursor = self._collection.find({"edbo_id": {"$in": list(missing)}}, self.projection)
+      async for teacher in cursor:
+        self._cache[teacher["edbo_id"]] = TeacherBase.model_construct(**teacher)
+        TeacherProfiles.put(teacher, generation=generation)
+      for edbo_id in missing:
+        self._cache.setdefault(edbo_id, None)
+    return {edbo_id: self._cache[edbo_id] for edbo_id in edbo_ids}
+
+  async def load(self, edbo_id: int) -> Optional[TeacherBase]:
+    """
+    Return the teacher profile by `edbo_id`.
+    """
+    return (await self.load_many([edbo_id]))[edbo_id]
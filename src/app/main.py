@@ -1,23 +1,50 @@
 from starlette.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from pymongo.errors import PyMongoError
+from redis.exceptions import RedisError
+from fastapi.responses import ORJSONResponse
+from fastapi import FastAPI, Depends
+import asyncio
 
 from core.config import settings
 from core.db import (
   MongoClient,
   RedisClient
 )
+from core.db.indexes import ensure_indexes
+from core.metrics import MetricsMiddleware, metrics, track_in_flight, mark_process_dead
+from core.logger import logger
+from core.security.revocation import RevocationFilter
+from core.security.utils import Hash
+from loaders import TeacherProfiles
+from api.responses import NEXT_CURSOR_HEADER
 from api.api import api_router
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
   await RedisClient.connect()
   await MongoClient.connect()
+  # Open the pools before accepting traffic
+  try:
+    await asyncio.gather(RedisClient.warm(), MongoClient.warm())
+  except (RedisError, PyMongoError) as err:
+    logger.error({"msg": "[x] Failed to warm the connection pools.", "detail": err})
+  if settings.MONGO_ENSURE_INDEXES and MongoClient._client is not None:
+    try:
+      await ensure_indexes(MongoClient._client)
+    except PyMongoError as err:
+      logger.error({"msg": "[x] Failed to ensure MongoDB indexes.", "detail": err})
+  await TeacherProfiles.start(RedisClient.subscriber(), MongoClient.get_database("users"))
+  await RevocationFilter.start(RedisClient.subscriber())
   try:
     yield
   finally:
+    await RevocationFilter.stop()
+    await TeacherProfiles.stop()
     await MongoClient.close()
     await RedisClient.close()
+    Hash.close()
+    mark_process_dead()
 
 app = FastAPI(
   title=settings.NAME,
@@ -25,7 +52,9 @@ app = FastAPI(
   summary=settings.SUMMARY,
   version=settings.VERSION,
   openapi_url=f"{settings.API_V1_STR}/openapi.json",
-  lifespan=lifespan
+  default_response_class=ORJSONResponse,
+  lifespan=lifespan,
+  dependencies=[Depends(track_in_flight)] if settings.METRICS_ENABLED else []
 )
 
 app.add_middleware(
@@ -33,7 +62,14 @@ app.add_middleware(
   allow_origins=["*"],
   allow_credentials=True,
   allow_methods=["*"],
-  allow_headers=["*"]
+  allow_headers=["*"],
+  # Readable by cross-origin clients paging the listings
+  expose_headers=[NEXT_CURSOR_HEADER]
 )
 
-app.include_router(api_router, prefix=settings.API_V1_STR)
\ No newline at end of file
+if settings.METRICS_ENABLED:
+  app.add_middleware(MetricsMiddleware)
+
+app.include_router(api_router, prefix=settings.API_V1_STR)
+if settings.METRICS_ENABLED:
+  app.add_api_route("/metrics", metrics, include_in_schema=False)
\ No newline at end of file
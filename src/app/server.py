@@ -0,0 +1,53 @@
+from pathlib import Path
+import tempfile
+import argparse
+import shutil
+import os
+
+import uvicorn
+
+from core.config import settings
+from core.logger import logger
+
+def main():
+  """
+  Production entry point: a prefork server of `WORKERS` processes, one per CPU by default.
+  """
+  parser = argparse.ArgumentParser(prog="unify-server", description="Run the API server.")
+  parser.add_argument("--host", default=settings.SERVER_HOST)
+  parser.add_argument("--port", type=int, default=settings.SERVER_PORT)
+  parser.add_argument("--workers", type=int, default=settings.WORKERS or os.cpu_count() or 1)
+  args = parser.parse_args()
+
+  # Keep the connection pools within their totals
+  if args.workers > settings.max_workers:
+    logger.warning(f"Capping {args.workers} workers at {settings.max_workers}, the most the connection pool totals allow.")
+    args.workers = settings.max_workers
+
+  # Each worker would sign with its own ephemeral key, rejecting the tokens of the others
+  keys_dir = settings.JWT_KEYS_DIR and any(Path(settings.JWT_KEYS_DIR).glob("*.pem"))
+  if args.workers > 1 and not (keys_dir or settings.JWT_PRIVATE_KEY):
+    parser.error("multiple workers need shared JWT signing keys, set JWT_KEYS_DIR or JWT_PRIVATE_KEY.")
+
+  # The workers size their connection pools by the worker count
+  os.environ["WORKERS"] = str(args.workers)
+  if args.workers > 1:
+    # Aggregate the Prometheus metrics of all workers
+    directory = Path(os.environ.setdefault(
+      "PROMETHEUS_MULTIPROC_DIR", str(Path(tempfile.gettempdir()) / "unify-metrics")))
+    shutil.rmtree(directory, ignore_errors=True)
+    directory.mkdir(parents=True)
+
+  uvicorn.run(
+    "main:app",
+    host=args.host,
+    port=args.port,
+    workers=args.workers,
+    reload=False,
+    proxy_headers=True,
+    # The rate limits are per client IP, behind a proxy it must be trusted
+    forwarded_allow_ips=settings.FORWARDED_ALLOW_IPS
+  )
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,273 @@
+"""
+Load-test and benchmark harness for the API.
+
+Drives the real FastAPI `app`, lifespan included, through `httpx.ASGITransport`
+with MongoDB and Redis swapped for local stand-ins (mongomock-motor and fakeredis
+by default, or a local mongod / redis). Reports the throughput and the
+p50/p95/p99 latency of every scenario as JSON.
+
+Run from `src/app`:
+
+    python ../benchmarks/load.py --concurrency 16 --requests 500 --output results.json
+    python ../benchmarks/load.py --baseline results.json --threshold 0.2
+"""
+from pathlib import Path
+from datetime import datetime, timedelta, timezone
+import statistics
+import subprocess
+import argparse
+import asyncio
+import time
+import json
+import uuid
+import sys
+import os
+
+# Minimal settings for the stand-ins, the environment takes precedence
+for key, value in {
+  "NAME": "unify-bench",
+  "MONGO_HOSTNAME": "localhost",
+  "MONGO_USERNAME": "bench",
+  "MONGO_PASSWORD": "bench",
+  "MONGO_DATABASE": "unify",
+  "REDIS_HOST": "localhost",
+  "REDIS_PORT": "6379",
+  "REDIS_USERNAME": "bench",
+  "REDIS_PASSWORD": "bench",
+  "CACHE_EXPIRE_MINUTES": "60",
+  "JWT_EXPIRE_MINUTES": "60",
+  # The scenarios replay the same logins, measure them rather than the rejections
+  "RATE_LIMIT_ENABLED": "false",
+}.items():
+  os.environ.setdefault(key, value)
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+from httpx import ASGITransport, AsyncClient
+from asgi_lifespan import LifespanManager
+
+from core.config import settings
+from core.db import MongoClient, RedisClient
+from core.db.indexes import ensure_collection
+from core.security.utils import Hash
+from core.schemas.schedule import lesson_day
+from main import app
+import crud
+
+from stand_ins import patch_mongomock
+
+PASSWORD = "benchmark-password"
+GROUP, DEGREE = "BENCH-1", "bachelor"
+SUBJECTS = ["math", "physics", "history", "programming"]
+
+TEACHER = {
+  "edbo_id": 200000001, "first_name": "Ada", "middle_name": "M", "last_name": "Lovelace",
+  "date_of_birth": "1980-12-10", "role": "teachers", "scopes": ["teacher"],
+  "disciplines": SUBJECTS, "specialities": ["121"], "acc_date": datetime(2024, 9, 1),
+}
+STUDENT = {
+  "edbo_id": 100000001, "first_name": "Alan", "middle_name": "M", "last_name": "Turing",
+  "date_of_birth": "2005-06-23", "role": "students", "scopes": ["student"],
+  "speciality": "121", "degree": DEGREE, "course": 2, "group": GROUP,
+  "start_of_study": "2024-09-01", "complete_of_study": "2028-06-30",
+  "class_teacher_edbo": TEACHER["edbo_id"], "acc_date": datetime(2024, 9, 1),
+}
+
+async def insert(db, name: str, documents: list):
+  # Index before inserting, as the app does for the collections it creates
+  await ensure_collection(db, name)
+  if documents:
+    await db.get_collection(name).insert_many(documents)
+
+async def seed(mongo, *, lessons: int, students: int):
+  """
+  Seeds the users, the group, its schedule and the grades.
+  """
+  users_db = mongo.get_database("users")
+  password = Hash.hash(PASSWORD)
+  await insert(users_db, "teachers", [{**TEACHER, "password": password}])
+  roster = [{**STUDENT, "edbo_id": STUDENT["edbo_id"] + i, "password": password} for i in range(students)]
+  await insert(users_db, "students", roster)
+  await ensure_collection(users_db, crud.USERS_INDEX)
+  await crud.index_users(users_db, users=[TEACHER, *roster])
+
+  groups_db = mongo.get_database("groups")
+  await insert(groups_db, DEGREE, [{
+    "degree": DEGREE, "course": 2, "group": GROUP, "specialty": "121",
+    "disciplines": {subject: TEACHER["edbo_id"] for subject in SUBJECTS},
+    "class_teacher_edbo": TEACHER["edbo_id"], "date": datetime(2024, 9, 1)}])
+  await insert(groups_db, crud.GROUPS_INDEX, [
+    {"group": GROUP, "degree": DEGREE, "class_teacher_edbo": TEACHER["edbo_id"]}])
+
+  schedule_db = mongo.get_database("schedule")
+  start = datetime(2026, 9, 1)
+  schedule = [{
+    "subject": SUBJECTS[i % len(SUBJECTS)], "position": i % 6 + 1, "classroom": 100 + i % 20,
+    "date": start + timedelta(days=i // 6), "topic": f"Topic {i}",
+    "homework": f"Homework {i}", "group": GROUP, "teacher_edbo": TEACHER["edbo_id"],
+    "lesson_id": str(uuid.uuid4())} for i in range(lessons)]
+  await insert(schedule_db, GROUP, [dict(lesson) for lesson in schedule])
+  await insert(schedule_db, crud.TIMETABLE, [dict(lesson) for lesson in schedule])
+
+  grades = []
+  for i, student in enumerate(roster):
+    # A grade per lesson, by subject and day
+    disciplines = {}
+    for j, lesson in enumerate(schedule):
+      disciplines.setdefault(lesson["subject"], {})[lesson_day(lesson["date"])] = (i + j) % 5 + 1
+    grades.append({"edbo_id": student["edbo_id"], "disciplines": disciplines})
+  await insert(mongo.get_database("grades"), GROUP, grades)
+
+async def login(client: AsyncClient, edbo_id: int) -> str:
+  response = await client.post(
+    f"{settings.API_V1_STR}/auth/login", data={"username": str(edbo_id), "password": PASSWORD})
+  response.raise_for_status()
+  return response.json()["access_token"]
+
+def scenarios(student_token: str, teacher_token: str, students: int) -> dict:
+  student = {"Authorization": f"Bearer {student_token}"}
+  teacher = {"Authorization": f"Bearer {teacher_token}"}
+  api = settings.API_V1_STR
+  return {
+    "auth_login": lambda client, i: client.post(
+      f"{api}/auth/login", data={"username": str(STUDENT["edbo_id"]), "password": PASSWORD}),
+    "user_me": lambda client, i: client.get(f"{api}/user/me", headers=student),
+    "schedule_my": lambda client, i: client.get(f"{api}/schedule/my", headers=student),
+    "schedule_week": lambda client, i: client.get(
+      f"{api}/schedule/my", params={"week": "2026-09-07"}, headers=student),
+    "groups_read_all": lambda client, i: client.get(f"{api}/groups/read/all", headers=teacher),
+    "grade_write": lambda client, i: client.patch(
+      f"{api}/teachers/assessment/{STUDENT['edbo_id'] + i % students}/grade", headers=teacher,
+      json={"subject": SUBJECTS[i % len(SUBJECTS)], "date": f"2026-10-{i % 28 + 1:02d}", "grade": i % 5 + 1}),
+  }
+
+def percentile(samples: list, q: int) -> float:
+  if len(samples) < 2:
+    return samples[0] if samples else 0.0
+  return statistics.quantiles(samples, n=100, method="inclusive")[q - 1]
+
+async def run(client: AsyncClient, request, *, requests: int, concurrency: int) -> dict:
+  """
+  Sends `requests` requests from `concurrency` concurrent workers.
+  """
+  counter = iter(range(requests))
+  latencies, errors = [], 0
+
+  async def worker():
+    nonlocal errors
+    while (i := next(counter, None)) is not None:
+      start = time.perf_counter()
+      response = await request(client, i)
+      latencies.append((time.perf_counter() - start) * 1000)
+      errors += response.status_code >= 400
+
+  started = time.perf_counter()
+  await asyncio.gather(*(worker() for _ in range(concurrency)))
+  elapsed = time.perf_counter() - started
+  return {
+    "requests": requests,
+    "errors": errors,
+    "throughput_rps": round(requests / elapsed, 2),
+    "p50_ms": round(percentile(latencies, 50), 3),
+    "p95_ms": round(percentile(latencies, 95), 3),
+    "p99_ms": round(percentile(latencies, 99), 3),
+  }
+
+def stand_ins(args: argparse.Namespace):
+  if args.mongo_url:
+    from pymongo import AsyncMongoClient
+    mongo = AsyncMongoClient(args.mongo_url)
+  else:
+    from mongomock_motor import AsyncMongoMockClient
+    patch_mongomock()
+    mongo = AsyncMongoMockClient()
+  if args.redis_url:
+    from core.db.redis import InstrumentedRedis
+    redis = InstrumentedRedis.from_url(args.redis_url, decode_responses=True)
+  else:
+    from fakeredis import FakeAsyncRedis
+    redis = FakeAsyncRedis(decode_responses=True)
+  return mongo, redis
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+  """
+  Returns the scenarios whose p95 latency regressed beyond `threshold`.
+  """
+  regressions = []
+  for name, result in results["scenarios"].items():
+    previous = baseline.get("scenarios", {}).get(name)
+    if previous and result["p95_ms"] > previous["p95_ms"] * (1 + threshold):
+      regressions.append(f"{name}: p95 {previous['p95_ms']}ms -> {result['p95_ms']}ms")
+  return regressions
+
+def git_commit() -> str:
+  try:
+    return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+  except (OSError, subprocess.CalledProcessError):
+    return "unknown"
+
+async def main(args: argparse.Namespace) -> int:
+  mongo, redis = stand_ins(args)
+  if args.mongo_url:
+    for name in ("users", "groups", "schedule", "grades"):
+      await mongo.drop_database(name)
+  await redis.flushdb()
+  await seed(mongo, lessons=args.lessons, students=args.students)
+
+  # The lifespan connects the singletons to the stand-ins
+  async def connect_mongo(cls):
+    cls._client = mongo
+  async def connect_redis(cls):
+    cls._client = redis
+  async def close_mongo(cls):
+    # mongomock has no connections to close
+    if args.mongo_url:
+      await cls._client.aclose()
+    cls._client = None
+  MongoClient.connect, RedisClient.connect = classmethod(connect_mongo), classmethod(connect_redis)
+  MongoClient.close = classmethod(close_mongo)
+
+  selected = set(args.scenarios or [])
+  async with LifespanManager(app, startup_timeout=30), \
+      AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+    student_token = await login(client, STUDENT["edbo_id"])
+    teacher_token = await login(client, TEACHER["edbo_id"])
+    results = {
+      "commit": git_commit(),
+      "timestamp": datetime.now(tz=timezone.utc).isoformat(),
+      "config": {
+        "concurrency": args.concurrency, "requests": args.requests,
+        "lessons": args.lessons, "students": args.students,
+        "mongo": args.mongo_url or "mongomock", "redis": args.redis_url or "fakeredis"},
+      "scenarios": {}
+    }
+    for name, request in scenarios(student_token, teacher_token, args.students).items():
+      if selected and name not in selected:
+        continue
+      # Warm up the caches and the connection pools
+      await run(client, request, requests=min(args.requests, 20), concurrency=args.concurrency)
+      results["scenarios"][name] = await run(client, request, requests=args.requests, concurrency=args.concurrency)
+
+  print(json.dumps(results, indent=2))
+  if args.output:
+    Path(args.output).write_text(json.dumps(results, indent=2))
+  if args.baseline:
+    regressions = compare(results, json.loads(Path(args.baseline).read_text()), args.threshold)
+    for regression in regressions:
+      print(f"[x] Regression {regression}", file=sys.stderr)
+    return 1 if regressions else 0
+  return 0
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--concurrency", type=int, default=8)
+  parser.add_argument("--requests", type=int, default=200, help="Requests per scenario.")
+  parser.add_argument("--lessons", type=int, default=40, help="Lessons in the seeded schedule.")
+  parser.add_argument("--students", type=int, default=30, help="Students in the seeded group.")
+  parser.add_argument("--scenarios", nargs="*", help="Scenarios to run, all by default.")
+  parser.add_argument("--mongo-url", help="Local mongod instead of mongomock, e.g. mongodb://localhost:27017.")
+  parser.add_argument("--redis-url", help="Local redis instead of fakeredis, e.g. redis://localhost:6379/15.")
+  parser.add_argument("--output", help="Write the results to this JSON file.")
+  parser.add_argument("--baseline", help="Fail if p95 latencies regressed against this results file.")
+  parser.add_argument("--threshold", type=float, default=0.2, help="Allowed p95 regression ratio.")
+  sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,70 @@
+"""
+Compares the per-request Redis cost of the authentication lookups:
+sequential EXISTS + HGETALL against the pipelined `OAuthJWTBearer.get_session`.
+
+Run from `src/app` against a local Redis:
+
+    python ../benchmarks/redis_auth.py --url redis://localhost:6379/0
+"""
+from pathlib import Path
+import statistics
+import argparse
+import asyncio
+import time
+import json
+import sys
+import uuid
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+import redis.asyncio as aioredis
+
+from core.security.jwt import OAuthJWTBearer
+from core.cache import SessionCache
+
+USERNAME = "100000001"
+
+async def sequential(redis: aioredis.Redis, jti: str):
+  if await OAuthJWTBearer.is_jti_in_blacklist(redis, jti=jti):
+    return
+  await redis.hgetall(SessionCache.key(USERNAME))
+
+async def pipelined(redis: aioredis.Redis, jti: str):
+  await OAuthJWTBearer.get_session(redis, jti=jti, username=USERNAME)
+
+def percentile(samples: list, q: float) -> float:
+  return statistics.quantiles(samples, n=100)[int(q) - 1]
+
+async def measure(redis: aioredis.Redis, func, requests: int) -> dict:
+  jti = str(uuid.uuid4())
+  samples = []
+  for _ in range(requests):
+    start = time.perf_counter()
+    await func(redis, jti)
+    samples.append((time.perf_counter() - start) * 1000)
+  return {
+    "p50_ms": round(percentile(samples, 50), 4),
+    "p99_ms": round(percentile(samples, 99), 4),
+    "mean_ms": round(statistics.fmean(samples), 4)
+  }
+
+async def main(args: argparse.Namespace):
+  redis = aioredis.from_url(args.url, decode_responses=True)
+  await SessionCache.set(redis, {"edbo_id": int(USERNAME), "role": "students", "scopes": ["student"]})
+  try:
+    # Warm up the connection pool
+    await measure(redis, pipelined, 100)
+    results = {
+      "sequential": await measure(redis, sequential, args.requests),
+      "pipelined": await measure(redis, pipelined, args.requests)
+    }
+  finally:
+    await SessionCache.invalidate(redis, USERNAME)
+    await redis.aclose()
+  print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--url", default="redis://localhost:6379/0")
+  parser.add_argument("--requests", type=int, default=5000)
+  asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,110 @@
+"""
+Compares the per-request CPU cost of the response serialization paths on
+large schedule and group payloads:
+
+  validated  - documents validated into the response model, dumped to
+               Python and encoded with the stdlib `json` (FastAPI default)
+  orjson     - the same round trip encoded with `orjson` (ORJSONResponse)
+  trusted    - `model_construct` and `TypeAdapter.dump_json` (`model_response`)
+
+The trusted path only pays off on the groups payload, so the schedule
+endpoints keep the validated orjson path.
+
+Run from `src/app`:
+
+    python ../benchmarks/serialization.py --lessons 500 --groups 200
+"""
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, List
+import argparse
+import timeit
+import json
+import sys
+import uuid
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+from pydantic import TypeAdapter
+import orjson
+
+from core.schemas.schedule import SchedulePrivate
+from core.schemas.teacher import TeacherBase
+from core.schemas.group import GroupBase
+
+SUBJECTS = ["math", "physics", "history", "programming", "english", "chemistry"]
+
+SCHEDULE = TypeAdapter(List[SchedulePrivate])
+GROUPS = TypeAdapter(Dict[str, List[GroupBase]])
+
+def teacher(edbo_id: int) -> dict:
+  return {
+    "edbo_id": edbo_id, "first_name": "Ada", "middle_name": "M", "last_name": "Lovelace",
+    "date_of_birth": "1980-12-10", "role": "teachers", "disciplines": SUBJECTS, "specialities": ["121"]}
+
+def lessons(count: int) -> List[dict]:
+  return [{
+    "subject": SUBJECTS[i % len(SUBJECTS)], "position": i % 6 + 1, "classroom": 100 + i % 20,
+    "date": datetime(2026, 9, i // 6 % 28 + 1), "topic": f"Topic {i}", "homework": f"Homework {i}",
+    "group": "BENCH-1", "teacher_edbo": 200000000 + i % len(SUBJECTS), "lesson_id": str(uuid.uuid4()),
+    "grade": i % 5 + 1} for i in range(count)]
+
+def groups(count: int) -> Dict[str, List[dict]]:
+  return {"bachelor": [{
+    "degree": "bachelor", "course": i % 4 + 1, "group": f"BENCH-{i}", "specialty": "121",
+    "disciplines": [{subject: teacher(200000000 + j)} for j, subject in enumerate(SUBJECTS)],
+    "class_teacher_edbo": 200000000 + i, "date": "2024-09-01T00:00:00"} for i in range(count)]}
+
+def validated_schedule(docs: List[dict], encode) -> bytes:
+  # Profiles constructed by the loader, lessons validated against the response model
+  content = [{**doc, "teacher": TeacherBase.model_construct(**teacher(doc["teacher_edbo"]))} for doc in docs]
+  return encode(SCHEDULE.dump_python(SCHEDULE.validate_python(content), mode="json", exclude_none=True))
+
+def trusted_schedule(docs: List[dict]) -> bytes:
+  return SCHEDULE.dump_json([SchedulePrivate.model_construct(
+    **{**doc, "teacher": TeacherBase.model_construct(**teacher(doc["teacher_edbo"]))}) for doc in docs],
+    exclude_none=True)
+
+def validated_groups(docs: Dict[str, List[dict]], encode) -> bytes:
+  return encode(GROUPS.dump_python(GROUPS.validate_python(docs), mode="json"))
+
+def trusted_groups(docs: Dict[str, List[dict]]) -> bytes:
+  return GROUPS.dump_json(
+    {degree: [GroupBase.model_construct(**group) for group in group_list] for degree, group_list in docs.items()})
+
+def stdlib(content) -> bytes:
+  return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+def measure(func, repeat: int) -> float:
+  """
+  Return the best per-call time in microseconds.
+  """
+  number = max(1, repeat // 5)
+  return round(min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6, 1)
+
+def main(args: argparse.Namespace):
+  schedule, group_docs = lessons(args.lessons), groups(args.groups)
+  assert json.loads(trusted_schedule(schedule)) == json.loads(validated_schedule(schedule, stdlib))
+  assert json.loads(trusted_groups(group_docs)) == json.loads(validated_groups(group_docs, stdlib))
+  results = {
+    "schedule": {
+      "lessons": args.lessons,
+      "validated_us": measure(lambda: validated_schedule(schedule, stdlib), args.repeat),
+      "orjson_us": measure(lambda: validated_schedule(schedule, orjson.dumps), args.repeat),
+      "trusted_us": measure(lambda: trusted_schedule(schedule), args.repeat),
+    },
+    "groups": {
+      "groups": args.groups,
+      "validated_us": measure(lambda: validated_groups(group_docs, stdlib), args.repeat),
+      "orjson_us": measure(lambda: validated_groups(group_docs, orjson.dumps), args.repeat),
+      "trusted_us": measure(lambda: trusted_groups(group_docs), args.repeat),
+    },
+  }
+  print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Response serialization benchmark.")
+  parser.add_argument("--lessons", type=int, default=500, help="Lessons in the schedule payload.")
+  parser.add_argument("--groups", type=int, default=200, help="Groups in the groups payload.")
+  parser.add_argument("--repeat", type=int, default=50, help="Calls per measurement.")
+  main(parser.parse_args())
@@ -0,0 +1,36 @@
+"""
+Compatibility shims of the local stand-ins, shared by the benchmarks and the tests.
+"""
+from functools import wraps
+import inspect
+
+def patch_mongomock():
+  """
+  Adapts mongomock 4.3 to the options the app uses: the `sort` that pymongo
+  4.9+ passes on to the bulk updates and replaces, and the partial indexes,
+  whose filters it doesn't apply.
+  """
+  from mongomock.collection import BulkOperationBuilder, Collection
+  from pymongo import IndexModel
+  for name in ("add_update", "add_replace"):
+    method = getattr(BulkOperationBuilder, name)
+    if "sort" in inspect.signature(method).parameters:
+      continue
+    @wraps(method)
+    def patched(self, *args, method=method, sort=None, **kwargs):
+      if sort is not None:
+        raise NotImplementedError("mongomock doesn't support sorted bulk writes.")
+      return method(self, *args, **kwargs)
+    setattr(BulkOperationBuilder, name, patched)
+
+  create_indexes = Collection.create_indexes
+  @wraps(create_indexes)
+  def create_partial_indexes(self, indexes, *args, **kwargs):
+    # The partial indexes only skip documents without the field, as sparse ones do
+    indexes = [
+      IndexModel(list(index.document["key"].items()), sparse=True, **{
+        option: value for option, value in index.document.items() if option not in ("key", "partialFilterExpression")})
+      if "partialFilterExpression" in index.document else index
+      for index in indexes]
+    return create_indexes(self, indexes, *args, **kwargs)
+  Collection.create_indexes = create_partial_indexes
@@ -0,0 +1,114 @@
+"""
+Measures how the throughput scales with the number of server workers.
+
+Starts `server.py` with each worker count against the MongoDB and Redis
+configured in `.env`, logs in with the given account and drives the
+endpoints from `--clients` load generator processes. Run the load
+generators on other cores than the server, or on another host with `--url`.
+
+Run from `src/app`:
+
+    python ../benchmarks/workers.py --workers 1 2 4 8 --username 100000001 --password secret
+"""
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import statistics
+import subprocess
+import argparse
+import asyncio
+import time
+import json
+import sys
+
+import httpx
+
+APP_DIR = Path(__file__).resolve().parents[1] / "app"
+API = "/api/v1"
+
+async def drive(url: str, token: str, paths: list, requests: int, concurrency: int) -> list:
+  """
+  Sends `requests` requests round-robin over `paths`, returning the latencies (ms).
+  """
+  counter = iter(range(requests))
+  latencies = []
+  headers = {"Authorization": f"Bearer {token}"}
+  limits = httpx.Limits(max_connections=concurrency)
+  async with httpx.AsyncClient(base_url=url, headers=headers, limits=limits, timeout=30) as client:
+    async def worker():
+      while (i := next(counter, None)) is not None:
+        start = time.perf_counter()
+        response = await client.get(paths[i % len(paths)])
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - start) * 1000)
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+  return latencies
+
+def generator(url: str, token: str, paths: list, requests: int, concurrency: int) -> list:
+  return asyncio.run(drive(url, token, paths, requests, concurrency))
+
+def wait_ready(url: str, timeout: float = 60):
+  deadline = time.monotonic() + timeout
+  while time.monotonic() < deadline:
+    try:
+      if httpx.get(f"{url}{API}/openapi.json").status_code == 200:
+        return
+    except httpx.TransportError:
+      pass
+    time.sleep(0.5)
+  raise SystemExit(f"[x] Server at {url} not ready after {timeout}s.")
+
+def login(url: str, username: str, password: str) -> str:
+  response = httpx.post(f"{url}{API}/auth/login", data={"username": username, "password": password})
+  response.raise_for_status()
+  return response.json()["access_token"]
+
+def measure(args: argparse.Namespace, workers: int) -> dict:
+  server = subprocess.Popen(
+    [sys.executable, "server.py", "--workers", str(workers), "--port", str(args.port)], cwd=APP_DIR)
+  url = f"http://127.0.0.1:{args.port}"
+  try:
+    wait_ready(url)
+    token = login(url, args.username, args.password)
+    per_client = args.requests // args.clients
+    with ProcessPoolExecutor(args.clients) as pool:
+      # Warm up every worker
+      list(pool.map(generator, *zip(*[(url, token, args.paths, 50, args.concurrency)] * args.clients)))
+      started = time.perf_counter()
+      results = pool.map(generator, *zip(*[(url, token, args.paths, per_client, args.concurrency)] * args.clients))
+      latencies = [latency for result in results for latency in result]
+      elapsed = time.perf_counter() - started
+  finally:
+    server.terminate()
+    server.wait()
+  quantiles = statistics.quantiles(latencies, n=100)
+  return {
+    "requests": len(latencies),
+    "throughput_rps": round(len(latencies) / elapsed, 2),
+    "p50_ms": round(quantiles[49], 3),
+    "p99_ms": round(quantiles[98], 3),
+  }
+
+def main(args: argparse.Namespace):
+  results = {}
+  for workers in args.workers:
+    results[workers] = measure(args, workers)
+    print(f"[+] {workers} workers: {results[workers]['throughput_rps']} req/s", file=sys.stderr)
+  baseline = results[args.workers[0]]["throughput_rps"]
+  for result in results.values():
+    result["speedup"] = round(result["throughput_rps"] / baseline, 2)
+  print(json.dumps(results, indent=2))
+  if args.output:
+    Path(args.output).write_text(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+  parser.add_argument("--username", required=True, help="Account used to authenticate the requests.")
+  parser.add_argument("--password", required=True)
+  parser.add_argument("--paths", nargs="+", default=[f"{API}/user/me", f"{API}/schedule/my"])
+  parser.add_argument("--port", type=int, default=10100)
+  parser.add_argument("--clients", type=int, default=2, help="Load generator processes.")
+  parser.add_argument("--concurrency", type=int, default=32, help="Concurrent requests per client.")
+  parser.add_argument("--requests", type=int, default=10000, help="Requests per worker count.")
+  parser.add_argument("--output", help="Write the results to this JSON file.")
+  main(parser.parse_args())
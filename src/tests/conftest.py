@@ -1,6 +1,25 @@
+import os
+
+# Minimal settings for the test run, the environment takes precedence
+for key, value in {
+    "NAME": "unify-test",
+    "MONGO_HOSTNAME": "localhost",
+    "MONGO_USERNAME": "test",
+    "MONGO_PASSWORD": "test",
+    "MONGO_DATABASE": "unify",
+    "REDIS_HOST": "localhost",
+    "REDIS_PORT": "6379",
+    "REDIS_USERNAME": "test",
+    "REDIS_PASSWORD": "test",
+    "CACHE_EXPIRE_MINUTES": "60",
+    "JWT_EXPIRE_MINUTES": "60",
+}.items():
+    os.environ.setdefault(key, value)
+
 from httpx import ASGITransport, AsyncClient
 from typing import AsyncGenerator
 import pytest_asyncio 
+import pytest
 
 from mongomock_motor import AsyncMongoMockClient
 from asgi_lifespan import LifespanManager
@@ -12,6 +31,12 @@ from app.api.dependencies import (
 from app.crud import authenticate_user
 from app.core.db import MongoClient
 from app.main import app
+from benchmarks.stand_ins import patch_mongomock
+
+@pytest.fixture(scope="session", autouse=True)
+def mongomock_compat():
+    # The bulk writes and partial indexes of the app on mongomock
+    patch_mongomock()
 
 # @pytest_asyncio.fixture(autouse=True)
 # async def mock_mongo_db():
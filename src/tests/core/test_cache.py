@@ -0,0 +1,34 @@
+from fakeredis import FakeAsyncRedis
+import pytest_asyncio
+
+from core.cache import SessionCache
+
+@pytest_asyncio.fixture
+async def redis():
+    client = FakeAsyncRedis(decode_responses=True)
+    yield client
+    await client.aclose()
+
+def user(edbo_id: int) -> dict:
+    return {"edbo_id": edbo_id, "role": "students", "scopes": ["student"], "password": "hash"}
+
+async def test_set_tracks_the_session_by_role(redis):
+    await SessionCache.set(redis, user(1))
+    assert await redis.hgetall(SessionCache.key(1)) == {"edbo_id": "1", "role": '"students"', "scopes": '["student"]'}
+    assert await redis.zrange("auth:sessions:students", 0, -1) == ["1"]
+
+async def test_set_prunes_expired_sessions(redis):
+    for edbo_id in (1, 2, 3):
+        await SessionCache.set(redis, user(edbo_id))
+    # Session 1 expired and session 2 was slid past its tracked expiry
+    await redis.delete(SessionCache.key(1))
+    await redis.zadd("auth:sessions:students", {"1": 0, "2": 0})
+    await SessionCache.set(redis, user(4))
+    assert set(await redis.zrange("auth:sessions:students", 0, -1)) == {"2", "3", "4"}
+    assert await redis.zscore("auth:sessions:students", "2") > 0
+
+async def test_invalidate_role(redis):
+    for edbo_id in (1, 2):
+        await SessionCache.set(redis, user(edbo_id))
+    await SessionCache.invalidate_role(redis, "students")
+    assert not await redis.exists(SessionCache.key(1), SessionCache.key(2), "auth:sessions:students")
@@ -0,0 +1,40 @@
+from httpx import ASGITransport, AsyncClient
+from prometheus_client import REGISTRY
+from fastapi import FastAPI, Depends
+
+from core.metrics import MetricsMiddleware, metrics, track_in_flight
+from core.config import settings
+
+def metrics_app() -> FastAPI:
+    app = FastAPI(dependencies=[Depends(track_in_flight)])
+    app.add_middleware(MetricsMiddleware)
+    app.add_api_route("/metrics", metrics, include_in_schema=False)
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: int):
+        return {"in_flight": REGISTRY.get_sample_value(
+            "http_requests_in_flight", {"method": "GET", "route": "/items/{item_id}"})}
+
+    return app
+
+async def test_requests_are_labelled_by_route_template():
+    async with AsyncClient(transport=ASGITransport(app=metrics_app()), base_url="http://test") as client:
+        before = REGISTRY.get_sample_value(
+            "http_request_duration_seconds_count", {"method": "GET", "route": "/items/{item_id}", "status": "200"}) or 0
+        assert (await client.get("/items/1")).json() == {"in_flight": 1}
+        assert (await client.get("/items/2")).status_code == 200
+        assert (await client.get("/missing")).status_code == 404
+    assert REGISTRY.get_sample_value(
+        "http_request_duration_seconds_count", {"method": "GET", "route": "/items/{item_id}", "status": "200"}) == before + 2
+    assert REGISTRY.get_sample_value(
+        "http_request_duration_seconds_count", {"method": "GET", "route": "unmatched", "status": "404"}) >= 1
+    assert REGISTRY.get_sample_value("http_requests_in_flight", {"method": "GET", "route": "/items/{item_id}"}) == 0
+
+async def test_metrics_require_the_token(monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "scraper")
+    async with AsyncClient(transport=ASGITransport(app=metrics_app()), base_url="http://test") as client:
+        assert (await client.get("/metrics")).status_code == 401
+        assert (await client.get("/metrics", headers={"Authorization": "Bearer other"})).status_code == 401
+        response = await client.get("/metrics", headers={"Authorization": "Bearer scraper"})
+    assert response.status_code == 200
+    assert "http_request_duration_seconds" in response.text
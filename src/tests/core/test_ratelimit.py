@@ -0,0 +1,67 @@
+from httpx import ASGITransport, AsyncClient
+from mongomock_motor import AsyncMongoMockClient
+from fakeredis import FakeAsyncRedis
+import pytest_asyncio
+import asyncio
+
+from api.dependencies import get_mongo_client, get_redis_client
+from core.ratelimit import RateLimiter, _HIT_SCRIPT
+from core.config import settings
+from main import app
+
+@pytest_asyncio.fixture
+async def redis():
+    client = FakeAsyncRedis(decode_responses=True)
+    yield client
+    await client.aclose()
+
+async def test_rejects_over_the_limit(redis):
+    limits = {"ip": ("10.0.0.1", 3)}
+    for _ in range(3):
+        assert await RateLimiter.hit(redis, scope="login", limits=limits, window=60) == {}
+    retry = await RateLimiter.hit(redis, scope="login", limits=limits, window=60)
+    assert set(retry) == {"ip"}
+    assert 0 < retry["ip"] <= 60
+    # Rejected attempts are not recorded
+    assert await redis.zcard("ratelimit:login:ip:10.0.0.1") == 3
+
+async def test_script_is_registered_once(redis):
+    await RateLimiter.hit(redis, scope="login", limits={"ip": ("10.0.0.1", 3)}, window=60)
+    assert _HIT_SCRIPT(redis) is _HIT_SCRIPT(redis)
+    assert _HIT_SCRIPT(FakeAsyncRedis()) is not _HIT_SCRIPT(redis)
+
+async def test_limits_are_checked_together(redis):
+    await RateLimiter.hit(redis, scope="login", limits={"username": ("alan", 1)}, window=60)
+    retry = await RateLimiter.hit(
+        redis, scope="login", limits={"ip": ("10.0.0.1", 5), "username": ("alan", 1)}, window=60)
+    assert set(retry) == {"username"}
+    # The IP isn't charged for the rejected attempt
+    assert await redis.zcard("ratelimit:login:ip:10.0.0.1") == 0
+    # Other scopes and identities are counted apart
+    assert await RateLimiter.hit(redis, scope="token", limits={"username": ("alan", 1)}, window=60) == {}
+    assert await RateLimiter.hit(redis, scope="login", limits={"username": ("ada", 1)}, window=60) == {}
+
+async def test_window_slides(redis):
+    limits = {"ip": ("10.0.0.1", 2)}
+    for _ in range(2):
+        await RateLimiter.hit(redis, scope="login", limits=limits, window=1)
+    assert await RateLimiter.hit(redis, scope="login", limits=limits, window=1)
+    await asyncio.sleep(1.1)
+    assert await RateLimiter.hit(redis, scope="login", limits=limits, window=1) == {}
+
+async def test_login_responds_too_many_requests(redis, monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(settings, "RATE_LIMIT_PER_USERNAME", 2)
+    mongo = AsyncMongoMockClient()
+    app.dependency_overrides[get_mongo_client] = lambda: mongo
+    app.dependency_overrides[get_redis_client] = lambda: redis
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            url, form = f"{settings.API_V1_STR}/auth/login", {"username": "100000001", "password": "wrong-password"}
+            for _ in range(2):
+                assert (await client.post(url, data=form)).status_code != 429
+            response = await client.post(url, data=form)
+    finally:
+        app.dependency_overrides.clear()
+    assert response.status_code == 429
+    assert 0 < int(response.headers["Retry-After"]) <= settings.RATE_LIMIT_WINDOW_SECONDS
@@ -0,0 +1,24 @@
+from datetime import date, datetime
+import pytest
+
+from core.schemas.schedule import parse_lesson_date, lesson_day
+
+MIDNIGHT = datetime(2026, 10, 18)
+
+@pytest.mark.parametrize("value", [
+    "2026-10-18",
+    "18.10.2026",
+    "2026-10-18T09:30:00",
+    date(2026, 10, 18),
+    datetime(2026, 10, 18, 9, 30),
+])
+def test_parse_lesson_date(value):
+    assert parse_lesson_date(value) == MIDNIGHT
+
+@pytest.mark.parametrize("value", ["18/10/2026", "2026-13-01", "", 20261018, None])
+def test_parse_invalid_lesson_date(value):
+    with pytest.raises(ValueError):
+        parse_lesson_date(value)
+
+def test_lesson_day():
+    assert lesson_day("18.10.2026") == lesson_day(MIDNIGHT) == "2026-10-18"
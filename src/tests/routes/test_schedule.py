@@ -0,0 +1,51 @@
+from httpx import ASGITransport, AsyncClient
+from mongomock_motor import AsyncMongoMockClient
+from datetime import datetime
+import pytest_asyncio
+import asyncio
+import json
+
+from api.dependencies import get_mongo_client, get_current_user
+from api.responses import NDJSON_MEDIA_TYPE
+from core.config import settings
+from main import app
+
+GROUP = "PI-21"
+STUDENT = {"edbo_id": 7, "first_name": "Alan", "middle_name": "M", "last_name": "Turing",
+           "date_of_birth": "2005-06-23", "role": "students", "speciality": "CS", "degree": "bachelor",
+           "course": 2, "group": GROUP, "start_of_study": "2024", "complete_of_study": "2028",
+           "class_teacher_edbo": 1}
+LESSONS = [
+    {"lesson_id": str(day), "subject": "Math", "position": 1, "classroom": 101, "group": GROUP,
+     "date": datetime(2026, 10, day), "topic": "Sets", "homework": "None"}
+    for day in (19, 20)
+]
+
+@pytest_asyncio.fixture
+async def student_client():
+    mongo = AsyncMongoMockClient()
+    await mongo.get_database("schedule").get_collection(GROUP).insert_many([dict(lesson) for lesson in LESSONS])
+    await mongo.get_database("grades").get_collection(GROUP).insert_one(
+        {"edbo_id": 7, "disciplines": {"Math": {"2026-10-19": 5}}})
+    app.dependency_overrides[get_mongo_client] = lambda: mongo
+    app.dependency_overrides[get_current_user] = lambda: dict(STUDENT)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+    app.dependency_overrides.clear()
+
+def pending_grades() -> list:
+    return [task for task in asyncio.all_tasks() if "get_grades" in repr(task.get_coro())]
+
+async def test_my_schedule_joins_the_grades(student_client: AsyncClient):
+    response = await student_client.get(f"{settings.API_V1_STR}/schedule/my")
+    assert response.status_code == 200
+    assert [lesson.get("grade") for lesson in response.json()] == [5, None]
+    assert not pending_grades()
+
+async def test_my_schedule_streams_the_grades(student_client: AsyncClient):
+    response = await student_client.get(
+        f"{settings.API_V1_STR}/schedule/my", headers={"Accept": NDJSON_MEDIA_TYPE})
+    assert response.status_code == 200
+    lessons = [json.loads(line) for line in response.text.splitlines()]
+    assert [lesson.get("grade") for lesson in lessons] == [5, None]
+    assert not pending_grades()
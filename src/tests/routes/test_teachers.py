@@ -0,0 +1,52 @@
+from httpx import ASGITransport, AsyncClient
+from mongomock_motor import AsyncMongoMockClient
+from fakeredis import FakeAsyncRedis
+import pytest_asyncio
+
+from api.dependencies import get_mongo_client, get_redis_client, get_current_user
+from core.config import settings
+from main import app
+
+GROUP = "PI-21"
+STUDENT = {"edbo_id": 7, "first_name": "Alan", "middle_name": "M", "last_name": "Turing",
+           "date_of_birth": "2005-06-23", "role": "students", "speciality": "CS", "degree": "bachelor",
+           "course": 2, "group": GROUP, "start_of_study": "2024", "complete_of_study": "2028",
+           "class_teacher_edbo": 1}
+
+@pytest_asyncio.fixture
+async def mongo():
+    mongo = AsyncMongoMockClient()
+    await mongo.get_database("users").get_collection("students").insert_one(dict(STUDENT))
+    return mongo
+
+@pytest_asyncio.fixture
+async def teacher_client(mongo):
+    app.dependency_overrides[get_mongo_client] = lambda: mongo
+    app.dependency_overrides[get_redis_client] = lambda: FakeAsyncRedis(decode_responses=True)
+    app.dependency_overrides[get_current_user] = lambda: {"edbo_id": 1, "disciplines": ["Math"]}
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+    app.dependency_overrides.clear()
+
+async def test_grade_creates_the_grades_document(teacher_client: AsyncClient, mongo):
+    response = await teacher_client.patch(
+        f"{settings.API_V1_STR}/teachers/assessment/7/grade",
+        json={"subject": "Math", "date": "18.10.2026", "grade": 5})
+    assert response.status_code == 200
+    grades = await mongo.get_database("grades").get_collection(GROUP).find_one({"edbo_id": 7})
+    assert grades["disciplines"] == {"Math": {"2026-10-18": 5}}
+
+async def test_grade_unknown_student(teacher_client: AsyncClient):
+    response = await teacher_client.patch(
+        f"{settings.API_V1_STR}/teachers/assessment/8/grade",
+        json={"subject": "Math", "date": "2026-10-18", "grade": 5})
+    assert response.status_code == 404
+
+async def test_grades_create_the_grades_documents(teacher_client: AsyncClient, mongo):
+    response = await teacher_client.patch(
+        f"{settings.API_V1_STR}/teachers/assessment/grades",
+        json={"subject": "Math", "date": "2026-10-18", "grades": [{"edbo_id": 7, "grade": 4}, {"edbo_id": 8, "grade": 3}]})
+    assert response.status_code == 200
+    assert [result["status"] for result in response.json()] == ["updated", "not_found"]
+    grades = await mongo.get_database("grades").get_collection(GROUP).find_one({"edbo_id": 7})
+    assert grades["disciplines"] == {"Math": {"2026-10-18": 4}}
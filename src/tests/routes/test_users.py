@@ -0,0 +1,63 @@
+from httpx import ASGITransport, AsyncClient
+from mongomock_motor import AsyncMongoMockClient
+from fastapi import HTTPException
+import pytest_asyncio
+import pytest
+
+from api.dependencies import get_mongo_client, get_current_user
+from api.responses import NEXT_CURSOR_HEADER
+from core.config import settings
+from main import app
+import crud
+
+STUDENTS = [
+    {"edbo_id": edbo_id, "first_name": "Alan", "middle_name": "M", "last_name": "Turing",
+     "date_of_birth": "2005-06-23", "role": "students", "password": "hash"}
+    for edbo_id in (5, 3, 1, 4, 2)
+]
+
+@pytest_asyncio.fixture
+async def users_client():
+    mongo = AsyncMongoMockClient()
+    await mongo.get_database("users").get_collection("students").insert_many([dict(student) for student in STUDENTS])
+    app.dependency_overrides[get_mongo_client] = lambda: mongo
+    app.dependency_overrides[get_current_user] = lambda: {"edbo_id": 1, "scopes": ["admin"]}
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+    app.dependency_overrides.clear()
+
+def test_cursor_round_trip():
+    cursor = crud.encode_cursor({"edbo_id": 42, "first_name": "Alan"}, keys=crud.USERS_SORT)
+    assert "=" not in cursor
+    assert crud.decode_cursor(cursor, keys=crud.USERS_SORT) == {"edbo_id": 42}
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", crud.encode_cursor({"date": 1}, keys=("date",))])
+def test_decode_invalid_cursor(cursor):
+    with pytest.raises(HTTPException) as err:
+        crud.decode_cursor(cursor, keys=crud.USERS_SORT)
+    assert err.value.status_code == 400
+
+async def test_read_users_pages(users_client: AsyncClient):
+    url = f"{settings.API_V1_STR}/users/read/students/all"
+    edbo_ids, params = [], {"limit": 2}
+    while True:
+        response = await users_client.get(url, params=params)
+        assert response.status_code == 200
+        edbo_ids += [user["edbo_id"] for user in response.json()]
+        if not (after := response.headers.get(NEXT_CURSOR_HEADER)):
+            break
+        params = {"limit": 2, "after": after}
+    assert edbo_ids == [1, 2, 3, 4, 5]
+
+async def test_read_users_filter(users_client: AsyncClient):
+    response = await users_client.get(
+        f"{settings.API_V1_STR}/users/read/students/all", params={"filter": "first_name", "value": "Alan"})
+    assert response.status_code == 200
+    assert len(response.json()) == len(STUDENTS)
+
+async def test_cursor_header_is_exposed(users_client: AsyncClient):
+    response = await users_client.get(
+        f"{settings.API_V1_STR}/users/read/students/all", params={"limit": 2},
+        headers={"Origin": "https://admin.example.com"})
+    assert response.headers[NEXT_CURSOR_HEADER]
+    assert NEXT_CURSOR_HEADER in response.headers["Access-Control-Expose-Headers"]
@@ -0,0 +1,22 @@
+import pytest
+
+from core.security.jwt import OAuthJWTBearer, TokenCache
+
+@pytest.fixture(autouse=True)
+def token_cache(monkeypatch):
+    cache = TokenCache(maxsize=16)
+    monkeypatch.setattr(OAuthJWTBearer, "cache", cache)
+    return cache
+
+def test_decode_caches_by_digest(token_cache: TokenCache):
+    token = OAuthJWTBearer.encode({"sub": "100000001"})["jwt"]
+    payload = OAuthJWTBearer.decode(token)
+    assert payload["sub"] == "100000001"
+    assert list(token_cache._entries) == [TokenCache.digest(token)]
+    assert OAuthJWTBearer.decode(token) == payload
+    assert token_cache.metrics()["hits"] == 1
+
+def test_decode_rejects_tampered_token(token_cache: TokenCache):
+    token = OAuthJWTBearer.encode({"sub": "100000001"})["jwt"]
+    assert OAuthJWTBearer.decode(token[:-4] + "AAAA") is None
+    assert not token_cache._entries
@@ -0,0 +1,48 @@
+import pytest
+
+from core.security.keys import KeyRing, generate_private_key, private_key_to_pem
+from core.config import settings
+
+@pytest.fixture
+def keys_dir(tmp_path, monkeypatch):
+    for kid in ("20260101000000", "20261018000000"):
+        (tmp_path / f"{kid}.pem").write_bytes(private_key_to_pem(generate_private_key()))
+    monkeypatch.setattr(settings, "JWT_KEYS_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "JWT_PRIVATE_KEY", None)
+    monkeypatch.setattr(settings, "JWT_ACTIVE_KID", None)
+    return tmp_path
+
+@pytest.fixture(autouse=True)
+def key_ring(monkeypatch):
+    monkeypatch.setattr(KeyRing, "_private_keys", None)
+    monkeypatch.setattr(KeyRing, "_public_keys", None)
+    monkeypatch.setattr(KeyRing, "_active_kid", None)
+
+@pytest.fixture
+def env_key(monkeypatch):
+    monkeypatch.setattr(settings, "JWT_PRIVATE_KEY", private_key_to_pem(generate_private_key()).decode())
+
+def test_signs_with_the_newest_directory_key(keys_dir, env_key):
+    kid, _ = KeyRing.signing_key()
+    assert kid == "20261018000000"
+    assert KeyRing.verifying_key(settings.JWT_PRIVATE_KEY_KID) is not None
+    assert KeyRing.verifying_key("20260101000000") is not None
+
+def test_signs_with_the_active_key(keys_dir, env_key, monkeypatch):
+    monkeypatch.setattr(settings, "JWT_ACTIVE_KID", settings.JWT_PRIVATE_KEY_KID)
+    assert KeyRing.signing_key()[0] == settings.JWT_PRIVATE_KEY_KID
+
+def test_signs_with_the_env_key_alone(env_key, monkeypatch):
+    monkeypatch.setattr(settings, "JWT_KEYS_DIR", None)
+    monkeypatch.setattr(settings, "JWT_ACTIVE_KID", None)
+    assert KeyRing.signing_key()[0] == settings.JWT_PRIVATE_KEY_KID
+
+def test_env_key_never_replaces_a_directory_key(keys_dir, env_key, monkeypatch):
+    monkeypatch.setattr(settings, "JWT_PRIVATE_KEY_KID", "20261018000000")
+    with pytest.raises(ValueError):
+        KeyRing.load()
+
+def test_unknown_active_key(keys_dir, monkeypatch):
+    monkeypatch.setattr(settings, "JWT_ACTIVE_KID", "missing")
+    with pytest.raises(ValueError):
+        KeyRing.load()
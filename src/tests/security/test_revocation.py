@@ -0,0 +1,82 @@
+from fakeredis import FakeAsyncRedis
+import asyncio
+import uuid
+import pytest
+
+from core.security import revocation
+from core.security.revocation import BloomFilter, RevocationFilter
+
+NOW = 1_800_000_000
+
+@pytest.fixture
+def revocations(monkeypatch):
+    monkeypatch.setattr(revocation.time, "time", lambda: NOW)
+    monkeypatch.setattr(RevocationFilter, "_buckets", {})
+    monkeypatch.setattr(RevocationFilter, "_ready", True)
+    monkeypatch.setattr(RevocationFilter, "capacity", 100)
+    return RevocationFilter
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    items = [str(uuid.uuid4()) for _ in range(2000)]
+    for item in items:
+        bloom.add(item)
+    # Past its capacity too
+    assert all(item in bloom for item in items)
+
+def test_bloom_filter_error_rate():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    for _ in range(1000):
+        bloom.add(str(uuid.uuid4()))
+    false_positives = sum(str(uuid.uuid4()) in bloom for _ in range(10000))
+    assert false_positives < 300
+
+def test_revoked_jtis_are_reported(revocations):
+    jtis = [str(uuid.uuid4()) for _ in range(1000)]
+    for jti in jtis:
+        revocations.add(jti, NOW + 3600)
+    assert all(revocations.might_contain(jti) for jti in jtis)
+
+def test_buckets_grow_with_the_revocations(revocations):
+    for _ in range(350):
+        revocations.add(str(uuid.uuid4()), NOW + 3600)
+    [blooms] = revocations._buckets.values()
+    assert [bloom.capacity for bloom in blooms] == [100, 200, 400]
+    assert revocations.metrics()["bytes"] == sum(len(bloom.bits) for bloom in blooms)
+
+def test_buckets_expire(revocations, monkeypatch):
+    jti = str(uuid.uuid4())
+    revocations.add(jti, NOW + 60)
+    revocations.add(str(uuid.uuid4()), NOW + 3600)
+    # Already expired tokens are not added
+    revocations.add(str(uuid.uuid4()), NOW - 60)
+    assert len(revocations._buckets) == 2
+    assert revocations.might_contain(jti)
+
+    monkeypatch.setattr(revocation.time, "time", lambda: NOW + revocations.bucket_seconds + 60)
+    assert not revocations.might_contain(jti)
+    assert len(revocations._buckets) == 1
+
+def test_unready_filter_reports_every_jti(revocations, monkeypatch):
+    monkeypatch.setattr(RevocationFilter, "_ready", False)
+    assert revocations.might_contain(str(uuid.uuid4()))
+
+async def test_listener_skips_invalid_revocations(revocations):
+    redis = FakeAsyncRedis(decode_responses=True)
+    subscribed = asyncio.Event()
+    listener = asyncio.create_task(revocations._listen(redis, subscribed))
+    try:
+        await asyncio.wait_for(subscribed.wait(), timeout=5)
+        jti = str(uuid.uuid4())
+        for data in ["not-a-revocation", "soon:" + str(uuid.uuid4()), f"{NOW + 3600}:{jti}"]:
+            await redis.publish(revocation.REVOCATIONS_CHANNEL, data)
+        for _ in range(100):
+            if revocations._buckets:
+                break
+            await asyncio.sleep(0.01)
+        assert not listener.done()
+        [blooms] = revocations._buckets.values()
+        assert jti in blooms[0]
+    finally:
+        listener.cancel()
+        await asyncio.gather(listener, return_exceptions=True)
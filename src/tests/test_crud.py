@@ -0,0 +1,113 @@
+from mongomock_motor import AsyncMongoMockClient
+from fakeredis import FakeAsyncRedis
+from fastapi import HTTPException
+from datetime import date, datetime
+import pytest
+
+from core.db.indexes import USERS_INDEX
+from core.cache import SessionCache
+import crud
+
+STUDENT = {"edbo_id": 7, "first_name": "Alan", "middle_name": "M", "last_name": "Turing",
+           "date_of_birth": "2005-06-23", "role": "students", "email": "alan@example.com", "password": "hash"}
+
+@pytest.fixture
+def users_db():
+    return AsyncMongoMockClient().get_database("users")
+
+async def test_get_user_backfills_the_users_directory(users_db):
+    # An account created before the users directory
+    await users_db.get_collection("students").insert_one(dict(STUDENT))
+    user = await crud.get_user_by_username(users_db, username="alan@example.com", exclude=["password"])
+    assert user["edbo_id"] == 7 and "password" not in user
+    entry = await users_db.get_collection(USERS_INDEX).find_one({"edbo_id": 7}, {"_id": 0})
+    assert entry == {"edbo_id": 7, "role": "students", "email": "alan@example.com"}
+    assert (await crud.get_user_by_username(users_db, username=7))["email"] == "alan@example.com"
+
+async def test_get_unknown_user(users_db):
+    assert await crud.get_user_by_username(users_db, username="nobody@example.com") is None
+    assert await users_db.get_collection(USERS_INDEX).count_documents({}) == 0
+
+@pytest.mark.parametrize("kwargs, bounds", [
+    ({}, None),
+    ({"date_from": date(2026, 10, 14)}, {"$gte": datetime(2026, 10, 14)}),
+    ({"date_to": date(2026, 10, 14)}, {"$lt": datetime(2026, 10, 15)}),
+    ({"date_from": date(2026, 10, 1), "date_to": date(2026, 10, 31)},
+     {"$gte": datetime(2026, 10, 1), "$lt": datetime(2026, 11, 1)}),
+    # Monday to Sunday of the given day
+    ({"week": date(2026, 10, 14)}, {"$gte": datetime(2026, 10, 12), "$lt": datetime(2026, 10, 19)}),
+    ({"week": date(2026, 10, 18)}, {"$gte": datetime(2026, 10, 12), "$lt": datetime(2026, 10, 19)}),
+])
+def test_date_range(kwargs, bounds):
+    assert crud.date_range(**kwargs) == ({"date": bounds} if bounds else {})
+
+async def test_migrate_lesson_dates():
+    db = AsyncMongoMockClient().get_database("schedule")
+    lessons = db.get_collection("PI-21")
+    await lessons.insert_many([
+        {"lesson_id": str(position), "position": position, "date": value}
+        for position, value in enumerate(
+            ["2026-10-18", "18.10.2026", "2026-10-18T09:30:00", datetime(2026, 10, 18), "someday"])])
+
+    assert await crud.migrate_lesson_dates(db) == {"converted": 3, "failed": 1}
+    dates = [lesson["date"] async for lesson in lessons.find({}, sort=[("position", 1)])]
+    assert dates == [datetime(2026, 10, 18)] * 4 + ["someday"]
+    # Only the invalid dates are left over
+    assert await crud.migrate_lesson_dates(db) == {"converted": 0, "failed": 1}
+
+async def test_migrate_grade_dates():
+    db = AsyncMongoMockClient().get_database("grades")
+    grades = db.get_collection("PI-21")
+    await grades.insert_many([
+        {"edbo_id": 1, "disciplines": {"Math": {
+            # `18.10.2026` and `19.10.2026`, split into nested fields on write
+            "18": {"10": {"2026": 3}},
+            "19": {"10": {"2026": 4}},
+            "2026-10-18": 5,
+            "2026-10-20T00:00:00": 2,
+            "someday": 1,
+        }}},
+        {"edbo_id": 2, "disciplines": {"Math": {"2026-10-18": 4}}},
+    ])
+
+    assert await crud.migrate_grade_dates(db) == {"converted": 1, "failed": 1}
+    migrated = await grades.find_one({"edbo_id": 1})
+    assert migrated["disciplines"] == {"Math": {
+        # The grade already keyed by the lesson day wins over the converted one
+        "2026-10-18": 5,
+        "2026-10-19": 4,
+        "2026-10-20": 2,
+        # Invalid keys are kept
+        "someday": 1,
+    }}
+    assert (await grades.find_one({"edbo_id": 2}))["disciplines"] == {"Math": {"2026-10-18": 4}}
+    assert await crud.migrate_grade_dates(db) == {"converted": 0, "failed": 1}
+
+async def test_update_user_refreshes_the_session(users_db):
+    redis = FakeAsyncRedis(decode_responses=True)
+    await users_db.get_collection("students").insert_one(dict(STUDENT))
+    await crud.index_user(users_db, user=STUDENT)
+    await SessionCache.set(redis, STUDENT)
+    with pytest.raises(HTTPException) as response:
+        await crud.update_user(users_db, redis=redis, edbo_id=7, update_doc={"first_name": "Ada"})
+    assert response.value.status_code == 200
+    session = SessionCache.decode(await redis.hgetall(SessionCache.key(7)))
+    assert session["first_name"] == "Ada" and "password" not in session
+
+async def test_update_user_without_session(users_db):
+    redis = FakeAsyncRedis(decode_responses=True)
+    await users_db.get_collection("students").insert_one(dict(STUDENT))
+    with pytest.raises(HTTPException):
+        await crud.update_user(users_db, redis=redis, edbo_id=7, update_doc={"first_name": "Ada"})
+    # Writes never resurrect a logged out user
+    assert not await redis.exists(SessionCache.key(7))
+
+async def test_delete_user_drops_the_session(users_db):
+    redis = FakeAsyncRedis(decode_responses=True)
+    await users_db.get_collection("students").insert_one(dict(STUDENT))
+    await SessionCache.set(redis, STUDENT)
+    with pytest.raises(HTTPException) as response:
+        await crud.delete_user(users_db, redis=redis, edbo_id=7)
+    assert response.value.status_code == 200
+    assert not await redis.exists(SessionCache.key(7))
+    assert await crud.get_user_by_username(users_db, username=7) is None
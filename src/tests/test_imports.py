@@ -0,0 +1,31 @@
+import types
+import io
+import pytest
+
+from imports import InvalidRow, read_rows, spool_rows, spooled_rows
+
+def test_read_rows_streams_csv():
+    rows = read_rows(io.BytesIO(b"edbo_id,first_name,email\n1,Alan,\n2,Ada,ada@example.com\n"), format="csv")
+    assert isinstance(rows, types.GeneratorType)
+    assert next(rows) == {"edbo_id": "1", "first_name": "Alan"}
+    assert list(rows) == [{"edbo_id": "2", "first_name": "Ada", "email": "ada@example.com"}]
+
+def test_read_rows_reports_invalid_json_lines():
+    rows = list(read_rows(io.BytesIO(b'{"edbo_id": 1}\n\nnot json\n[2]\n'), format="jsonl"))
+    assert rows[0] == {"edbo_id": 1}
+    assert isinstance(rows[1], InvalidRow)
+    assert rows[2] == [2]
+
+@pytest.mark.parametrize("data, format", [
+    (b'{"edbo_id": 1}', "json"),
+    (b"not json", "json"),
+    (b"\xff\xfe", "jsonl"),
+])
+def test_spool_rows_rejects_unreadable_files(data, format):
+    with pytest.raises(ValueError):
+        spool_rows(io.BytesIO(data), format=format)
+
+def test_spooled_rows_round_trip():
+    spool = spool_rows(io.BytesIO(b'[{"edbo_id": 1}, {"edbo_id": 2}]'), format="json")
+    assert list(spooled_rows(spool)) == [{"edbo_id": 1}, {"edbo_id": 2}]
+    assert spool.closed
@@ -0,0 +1,25 @@
+from mongomock_motor import AsyncMongoMockClient
+import pytest
+
+from loaders import TeacherProfiles
+
+TEACHER = {"edbo_id": 1, "first_name": "Ada", "middle_name": "A", "last_name": "Lovelace",
+           "date_of_birth": "1815-12-10", "role": "teachers", "disciplines": ["Math"], "specialities": ["CS"]}
+
+@pytest.fixture
+def teachers_db():
+    TeacherProfiles.maxsize = 10
+    TeacherProfiles.invalidate()
+    yield AsyncMongoMockClient().get_database("users")
+    TeacherProfiles.invalidate()
+
+async def test_warm_skips_malformed_teachers(teachers_db):
+    # A teacher document missing its disciplines, and one with a null list
+    await teachers_db.get_collection("teachers").insert_many([
+        dict(TEACHER),
+        {key: value for key, value in TEACHER.items() if key != "disciplines"} | {"edbo_id": 2},
+        {**TEACHER, "edbo_id": 3, "specialities": None},
+    ])
+    assert await TeacherProfiles.warm(teachers_db) == 1
+    assert TeacherProfiles.get(1).disciplines == ["Math"]
+    assert TeacherProfiles.get(2) is None and TeacherProfiles.get(3) is None